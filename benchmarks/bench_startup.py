@@ -0,0 +1,56 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'run': 'import run',
+    'api': 'import src.api',
+    'async': 'import src.async_api',
+    'chain': 'from src.chain import get_web3; get_web3("http://127.0.0.1:8545")',
+    'signing': 'from src.api import sign_message; sign_message("startup", "0x" + "11" * 32)'
+}
+
+def measure(statement, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def slowest_imports(statement, limit):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        imports.append((int(parts[1]), parts[2].strip()))
+    return sorted(imports, reverse=True)[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold-start import time')
+    parser.add_argument('targets', nargs='*', default=list(TARGETS), help=f'any of: {", ".join(TARGETS)}')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=0, help='show the N slowest imports per target')
+    args = parser.parse_args()
+
+    baseline = statistics.median(measure('pass', args.runs))
+    print(f'interpreter startup: {baseline * 1000:.0f} ms')
+
+    for target in args.targets:
+        timings = measure(TARGETS[target], args.runs)
+        print(f'{target:>8}: median {statistics.median(timings) * 1000:.0f} ms, '
+              f'min {min(timings) * 1000:.0f} ms, '
+              f'over interpreter {(statistics.median(timings) - baseline) * 1000:.0f} ms')
+        for cumulative, module in slowest_imports(TARGETS[target], args.top):
+            print(f'{"":>10}{cumulative / 1000:8.1f} ms  {module}')
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-import concurrent.futures
+import argparse
 import os
 import sys
 from time import sleep
@@ -6,14 +6,17 @@ from colorama import init, Fore
 from src.utils import (
     load_config, 
     read_proxies, 
-    read_accounts, 
-    ensure_directories, 
+    iter_accounts,
+    count_accounts,
+    ensure_directories,
+    configure_logging, 
     countdown_timer,
     read_user_agents,
     error_log,
     info_log
 )
 from src.main import FantasyProcessor
+from src.scheduler import DailyScheduler, SkippedClaims, only_daily_enabled, plan_daily_claims, report_skipped
 
 def print_banner():
     banner = f"""
@@ -29,6 +32,71 @@ def print_banner():
 {Fore.RESET}"""
     print(banner)
 
+TASKS = ('daily', 'info', 'quests', 'fragments', 'tactics')
+
+def parse_account_ranges(value):
+    ranges = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = (int(bound) for bound in part.split('-', 1))
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid account range: {part}")
+        if start < 1 or end < start:
+            raise argparse.ArgumentTypeError(f"invalid account range: {part}")
+        ranges.append((start, end))
+
+    if not ranges:
+        raise argparse.ArgumentTypeError("empty account range")
+    return ranges
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Fantasy.top account manager')
+    parser.add_argument('tasks', nargs='*', metavar='task',
+                        help=f'tasks to run ({", ".join(TASKS)}); defaults to the tasks enabled in the config')
+    parser.add_argument('--config', default='data/config.json', help='path to config.json')
+    parser.add_argument('--threads', type=int, help='override app.threads')
+    parser.add_argument('--delay', type=int, help='seconds to wait before starting, skips the prompt')
+    parser.add_argument('--accounts', type=parse_account_ranges, metavar='RANGES',
+                        help='account numbers to process, e.g. 1-100,150')
+    parser.add_argument('--no-color', action='store_true', help='disable colored console output')
+    parser.add_argument('--resume', action='store_true',
+                        help='skip accounts and stages already completed today')
+    parser.add_argument('--daemon', action='store_true',
+                        help='keep running and process each account when its daily claim becomes due')
+    args = parser.parse_args()
+
+    unknown_tasks = [task for task in args.tasks if task not in TASKS]
+    if unknown_tasks:
+        parser.error(f'unknown task: {", ".join(unknown_tasks)} (choose from {", ".join(TASKS)})')
+    if args.threads is not None and args.threads < 1:
+        parser.error('--threads must be at least 1')
+    if args.delay is not None and args.delay < 0:
+        parser.error('--delay must not be negative')
+    return args
+
+def apply_cli_overrides(config, args):
+    if args.tasks:
+        config['daily']['enabled'] = 'daily' in args.tasks
+        config['info_check'] = 'info' in args.tasks
+        config['quest']['enabled'] = 'quests' in args.tasks
+        config['fragments']['enabled'] = 'fragments' in args.tasks
+        config['tactic']['enabled'] = 'tactics' in args.tasks
+    if args.threads is not None:
+        config['app']['threads'] = args.threads
+    if args.no_color:
+        config['app']['console_colors'] = False
+    return config
+
+def select_accounts(accounts, ranges):
+    return (account for account in accounts
+            if any(start <= account.number <= end for start, end in ranges))
+
 def get_start_delay():
     while True:
         try:
@@ -55,56 +123,80 @@ def start_countdown(seconds):
     print(f"\n{Fore.GREEN}Starting now!{Fore.RESET}")
 
 def main():
-    init()
+    args = parse_args()
+    init(strip=args.no_color or None)
     ensure_directories()
     print_banner()
+    processor = None
     
     try:
-        delay_seconds = get_start_delay()
+        if args.delay is not None:
+            delay_seconds = args.delay
+        elif sys.stdin.isatty():
+            delay_seconds = get_start_delay()
+        else:
+            delay_seconds = 0
         start_countdown(delay_seconds)
         
-        config = load_config()
+        config = apply_cli_overrides(load_config(args.config), args)
+        configure_logging(config)
         proxies_dict, all_proxies = read_proxies(config['app']['proxy_file'])
         user_agents_cycle = read_user_agents()
-        accounts = read_accounts(config['app']['keys_file'])
-        
-        total_accounts = len(accounts)
+        accounts = iter_accounts(config['app']['keys_file'])
+        total_accounts = count_accounts(config['app']['keys_file'])
         if total_accounts == 0:
             error_log("No accounts found in the keys file")
             sys.exit(1)
 
-        print(f"\n{Fore.YELLOW}Total accounts to process: {total_accounts}")
-        print(f"{Fore.YELLOW}Number of threads: {config['app']['threads']}")
-        print(f"{Fore.GREEN}Starting now!")
+        if args.accounts:
+            if not any(start <= total_accounts for start, _ in args.accounts):
+                error_log("No accounts match the selected range")
+                sys.exit(1)
+            accounts = select_accounts(accounts, args.accounts)
+
+        if args.daemon:
+            processor_class = FantasyProcessor
+        elif config['app'].get('engine', 'threads') == 'async':
+            import asyncio
+            from src.async_api import AsyncFantasyProcessor
+            processor_class = AsyncFantasyProcessor
+        else:
+            processor_class = FantasyProcessor
 
-        processor = FantasyProcessor(
+        processor = processor_class(
             config=config,
             proxies_dict=proxies_dict,
             all_proxies=all_proxies,
-            user_agents_cycle=user_agents_cycle
+            user_agents_cycle=user_agents_cycle,
+            resume=args.resume
         )
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=config['app']['threads']) as executor:
-            futures = []
-            for account_number, account_data in accounts:
-                if len(account_data) != 2:
-                    error_log(f"Invalid account data format for account {account_number}")
-                    continue
-                    
-                private_key, wallet_address = account_data
-                future = executor.submit(
-                    processor.process_account_with_retry,
-                    account_number,
-                    private_key,
-                    wallet_address,
-                    total_accounts
-                )
-                futures.append(future)
-
-            concurrent.futures.wait(futures)
-
-        processor.retry_failed_accounts()
+        if args.daemon:
+            scheduler = DailyScheduler(processor, accounts, total_accounts,
+                                       config['app'].get('daemon_retry_interval', 3600))
+            print(f"\n{Fore.YELLOW}Daemon mode: {total_accounts} accounts, {config['app']['threads']} threads")
+            scheduler.run()
+            return
+
+        skipped = SkippedClaims()
+        if only_daily_enabled(config):
+            accounts = plan_daily_claims(accounts, processor.account_storage, skipped)
+
+        print(f"\n{Fore.YELLOW}Total accounts in keys file: {total_accounts}")
+        if config['app'].get('engine', 'threads') == 'async':
+            print(f"{Fore.YELLOW}Engine: async, max in flight: {config['app'].get('max_in_flight', 200)}")
+        else:
+            print(f"{Fore.YELLOW}Number of threads: {config['app']['threads']}")
+        if args.resume:
+            print(f"{Fore.YELLOW}Resuming: accounts and stages completed today will be skipped")
+        print(f"{Fore.GREEN}Starting now!")
+
+        if config['app'].get('engine', 'threads') == 'async':
+            asyncio.run(processor.run(accounts, total_accounts))
+        else:
+            processor.run(accounts, total_accounts)
 
+        report_skipped(skipped)
         final_success_rate = processor.retry_manager.get_success_rate() * 100
         info_log(f"Final success rate: {final_success_rate:.2f}%")
 
@@ -114,6 +206,9 @@ def main():
     except Exception as e:
         error_log(f"Critical error in main execution: {str(e)}")
         sys.exit(1)
+    finally:
+        if processor:
+            processor.close()
 
 if __name__ == "__main__":
     main()
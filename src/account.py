@@ -0,0 +1,22 @@
+from typing import Optional
+
+class Account:
+    __slots__ = ('number', 'address', 'private_key', 'token', 'cookies', 'stages', 'deadline')
+
+    def __init__(self, number: int, private_key: str, address: str):
+        self.number = number
+        self.private_key = private_key
+        self.address = address
+        self.token: Optional[str] = None
+        self.cookies: Optional[dict] = None
+        self.stages = set()
+        self.deadline: Optional[float] = None
+
+    def __eq__(self, other):
+        return isinstance(other, Account) and self.address == other.address
+
+    def __hash__(self):
+        return hash(self.address)
+
+    def __repr__(self):
+        return f'Account({self.number}, {self.address})'
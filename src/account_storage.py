@@ -1,59 +1,269 @@
+import atexit
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence
 import pytz
+from .utils import error_log
 
 class AccountStorage:
-    def __init__(self, storage_file: str = "data/accounts_data.json"):
+    FIELDS = (
+        'private_key',
+        'created_at',
+        'token',
+        'token_updated_at',
+        'cookies',
+        'cookies_updated_at',
+        'last_daily_claim',
+        'next_daily_claim'
+    )
+
+    def __init__(self, storage_file: str = "data/accounts.db", legacy_file: str = "data/accounts_data.json",
+                 flush_interval: float = 1.0, batch_size: int = 100):
         self.storage_file = storage_file
-        self.data = self._load_data()
+        self.legacy_file = legacy_file
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.conn = self._connect()
+        self._migrate_legacy_data()
+
+        self.pending = {}
+        self.flushing = {}
+        self.pending_condition = threading.Condition()
+        self.flush_lock = threading.Lock()
+        self.closed = False
+        self.flush_thread = threading.Thread(target=self._flush_loop, name='account-storage-flush', daemon=True)
+        self.flush_thread.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.storage_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.storage_file, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS accounts (
+                address TEXT PRIMARY KEY,
+                private_key TEXT NOT NULL,
+                created_at TEXT,
+                token TEXT,
+                token_updated_at TEXT,
+                cookies TEXT,
+                cookies_updated_at TEXT,
+                last_daily_claim TEXT,
+                next_daily_claim TEXT
+            )
+        ''')
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(accounts)')}
+        if 'next_daily_claim' not in columns:
+            conn.execute('ALTER TABLE accounts ADD COLUMN next_daily_claim TEXT')
+        conn.commit()
+        return conn
+
+    def _migrate_legacy_data(self):
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+
+        with self.lock:
+            if self.conn.execute('SELECT 1 FROM accounts LIMIT 1').fetchone():
+                return
 
-    def _load_data(self) -> Dict:
-        if os.path.exists(self.storage_file):
             try:
-                with open(self.storage_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-        return {}
+                with open(self.legacy_file, 'r') as f:
+                    legacy_data = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                return
+
+            rows = []
+            for address, account_data in legacy_data.items():
+                if not isinstance(account_data, dict) or not account_data.get('private_key'):
+                    continue
+                row = self._encode(account_data)
+                rows.append((address,) + tuple(row.get(field) for field in self.FIELDS))
+
+            if rows:
+                columns = ', '.join(('address',) + self.FIELDS)
+                placeholders = ', '.join('?' * (len(self.FIELDS) + 1))
+                with self.conn:
+                    self.conn.executemany(
+                        f'INSERT OR IGNORE INTO accounts ({columns}) VALUES ({placeholders})',
+                        rows
+                    )
 
-    def _save_data(self):
-        os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
-        with open(self.storage_file, 'w') as f:
-            json.dump(self.data, f, indent=4)
+    def _encode(self, fields: Dict) -> Dict:
+        encoded = dict(fields)
+        if isinstance(encoded.get('cookies'), dict):
+            encoded['cookies'] = json.dumps(encoded['cookies'])
+        return encoded
+
+    def _decode(self, row: sqlite3.Row) -> Dict:
+        account_data = {key: row[key] for key in self.FIELDS if row[key] is not None}
+        if 'cookies' in account_data:
+            try:
+                account_data['cookies'] = json.loads(account_data['cookies'])
+            except json.JSONDecodeError:
+                del account_data['cookies']
+        return account_data
 
     def update_account(self, address: str, private_key: str, token: Optional[str] = None,
-                      cookies: Optional[Dict] = None, last_daily_claim: Optional[str] = None):
-        if address not in self.data:
-            self.data[address] = {
-                "private_key": private_key,
-                "created_at": datetime.now(pytz.UTC).isoformat()
-            }
-        
-        account_data = self.data[address]
-        
+                      cookies: Optional[Dict] = None, last_daily_claim: Optional[str] = None,
+                      next_daily_claim: Optional[str] = None):
+        now = datetime.now(pytz.UTC).isoformat()
+        fields = {}
+
         if token is not None:
-            account_data["token"] = token
-            account_data["token_updated_at"] = datetime.now(pytz.UTC).isoformat()
-        
+            fields["token"] = token
+            fields["token_updated_at"] = now
+
         if cookies is not None:
-            account_data["cookies"] = cookies
-            account_data["cookies_updated_at"] = datetime.now(pytz.UTC).isoformat()
-        
+            fields["cookies"] = cookies
+            fields["cookies_updated_at"] = now
+
         if last_daily_claim is not None:
-            account_data["last_daily_claim"] = last_daily_claim
-        
-        self._save_data()
+            fields["last_daily_claim"] = last_daily_claim
+
+        if next_daily_claim is not None:
+            fields["next_daily_claim"] = next_daily_claim
+
+        with self.pending_condition:
+            if self.closed:
+                self._write_batch({address: (private_key, now, fields)})
+                return
+
+            if address in self.pending:
+                self.pending[address][2].update(fields)
+            else:
+                self.pending[address] = (private_key, now, fields)
+
+            if len(self.pending) >= self.batch_size:
+                self.pending_condition.notify()
+
+    def _flush_loop(self):
+        while True:
+            with self.pending_condition:
+                self.pending_condition.wait_for(
+                    lambda: self.closed or len(self.pending) >= self.batch_size,
+                    timeout=self.flush_interval
+                )
+                if self.closed:
+                    return
+            self.flush()
+
+    def _write_batch(self, batch: Dict):
+        with self.lock, self.conn:
+            for address, (private_key, created_at, fields) in batch.items():
+                fields = self._encode(fields)
+                columns = ['address', 'private_key', 'created_at'] + list(fields)
+                values = [address, private_key, created_at] + list(fields.values())
+                placeholders = ', '.join('?' * len(columns))
+
+                if fields:
+                    assignments = ', '.join(f'{column} = excluded.{column}' for column in fields)
+                    conflict = f'DO UPDATE SET {assignments}'
+                else:
+                    conflict = 'DO NOTHING'
+
+                self.conn.execute(
+                    f'INSERT INTO accounts ({", ".join(columns)}) VALUES ({placeholders}) '
+                    f'ON CONFLICT(address) {conflict}',
+                    values
+                )
+
+    def flush(self):
+        with self.flush_lock:
+            with self.pending_condition:
+                if not self.pending:
+                    return
+                self.flushing, self.pending = self.pending, {}
+
+            try:
+                self._write_batch(self.flushing)
+            except sqlite3.Error as e:
+                error_log(f'Error flushing account storage: {str(e)}')
+                with self.pending_condition:
+                    for address, update in self.flushing.items():
+                        if address in self.pending:
+                            update[2].update(self.pending[address][2])
+                        self.pending[address] = update
+            finally:
+                with self.pending_condition:
+                    self.flushing = {}
 
     def get_account_data(self, address: str) -> Optional[Dict]:
-        return self.data.get(address)
+        # Same order as update_account(): pending_condition, then lock. Holding both keeps
+        # the row and the write-behind fields from the same moment.
+        with self.pending_condition, self.lock:
+            updates = [batch[address] for batch in (self.flushing, self.pending) if address in batch]
+            row = self.conn.execute('SELECT * FROM accounts WHERE address = ?', (address,)).fetchone()
+
+            if not row and not updates:
+                return None
+
+            account_data = self._decode(row) if row else {}
+            for private_key, created_at, fields in updates:
+                account_data.setdefault('private_key', private_key)
+                account_data.setdefault('created_at', created_at)
+                account_data.update(fields)
+            return account_data
+
+    def _due_time(self, account_data: Dict) -> Optional[datetime]:
+        due_times = []
+        try:
+            if account_data.get("last_daily_claim"):
+                last_claim = datetime.fromisoformat(account_data["last_daily_claim"])
+                if last_claim.tzinfo is None:
+                    last_claim = last_claim.replace(tzinfo=pytz.UTC)
+                due_times.append(last_claim + timedelta(hours=24))
+            if account_data.get("next_daily_claim"):
+                next_claim = datetime.fromisoformat(account_data["next_daily_claim"])
+                if next_claim.tzinfo is None:
+                    next_claim = next_claim.replace(tzinfo=pytz.UTC)
+                due_times.append(next_claim)
+        except ValueError:
+            return None
+        return max(due_times) if due_times else None
 
     def get_next_daily_claim_time(self, address: str) -> Optional[datetime]:
         account_data = self.get_account_data(address)
-        if not account_data or "last_daily_claim" not in account_data:
+        if not account_data:
             return None
 
-        last_claim = datetime.fromisoformat(account_data["last_daily_claim"])
-        next_claim = last_claim.replace(tzinfo=pytz.UTC) + timedelta(hours=24)
-        return next_claim if next_claim > datetime.now(pytz.UTC) else None
+        next_claim = self._due_time(account_data)
+        return next_claim if next_claim and next_claim > datetime.now(pytz.UTC) else None
+
+    def get_next_daily_claim_times(self, addresses: Sequence[str]) -> Dict[str, datetime]:
+        self.flush()
+        placeholders = ', '.join('?' * len(addresses))
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT address, last_daily_claim, next_daily_claim FROM accounts '
+                f'WHERE address IN ({placeholders}) '
+                'AND (last_daily_claim IS NOT NULL OR next_daily_claim IS NOT NULL)',
+                tuple(addresses)
+            ).fetchall()
+
+        now = datetime.now(pytz.UTC)
+        due_times = {}
+        for row in rows:
+            next_claim = self._due_time(dict(row))
+            if next_claim and next_claim > now:
+                due_times[row['address']] = next_claim
+        return due_times
+
+    def close(self):
+        with self.pending_condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.pending_condition.notify_all()
+
+        self.flush_thread.join()
+        self.flush()
+        atexit.unregister(self.close)
@@ -2,22 +2,67 @@ import json
 from time import sleep
 import random
 import requests
-from web3 import Web3
-from eth_account.messages import encode_defunct
 from datetime import datetime, timedelta
-from dateutil import parser
 import pytz
 import math
-import os
-import jwt
 from typing import Dict, Optional, Tuple
 from colorama import Fore
-from .utils import error_log, success_log, info_log, rate_limit_log
-from capmonster_python import TurnstileTask
+from .utils import error_log, success_log, info_log
+from .ledgers import create_result_writer
+from .retry_policy import CallResult, RetryPolicy
+from .circuit_breaker import CircuitOpenError
+from .chain import (
+    get_web3,
+    get_balance_service,
+    get_receipt_tracker,
+    get_nonce_manager,
+    get_gas_price_oracle
+)
 import threading
 import time
 
 
+def get_privy_headers(base_url: str, user_agent: str) -> Dict[str, str]:
+    return {
+        'Accept': 'application/json',
+        'Content-Type': 'application/json',
+        'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+        'Origin': base_url,
+        'Referer': f'{base_url}/',
+        'User-Agent': user_agent,
+        'Privy-App-Id': 'clra3wyj700lslb0frokrj261',
+        'Privy-Client': 'react-auth:1.92.8',
+        'Privy-Client-Id': 'client-WY2gt82Pt8inAqcq7bpeCwm6Y42kx96jX6hVeVwF8K1qQ',
+        'Privy-Ca-Id': '315a64ce-afe9-4e58-87ea-3abd2d9a9484',
+        'Sec-Ch-Ua': '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
+        'Sec-Ch-Ua-Mobile': '?0',
+        'Sec-Ch-Ua-Platform': '"Windows"',
+        'Sec-Fetch-Dest': 'empty',
+        'Sec-Fetch-Mode': 'cors',
+        'Sec-Fetch-Site': 'same-site',
+        'Priority': 'u=1, i'
+    }
+
+def create_sign_message(wallet_address: str, nonce: str) -> str:
+    return f"""fantasy.top wants you to sign in with your Ethereum account:
+{wallet_address}
+
+By signing, you are proving you own this wallet and logging in. This does not initiate a transaction or cost any fees.
+
+URI: https://fantasy.top
+Version: 1
+Chain ID: 81457
+Nonce: {nonce}
+Issued At: {datetime.utcnow().isoformat()}Z
+Resources:
+- https://privy.io"""
+
+def sign_message(message: str, private_key: str):
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
+
+    return Account.sign_message(encode_defunct(message.encode('utf-8')), private_key)
+
 class TokenManager:
     def __init__(self, account_storage, api_instance):
         self.account_storage = account_storage
@@ -27,6 +72,8 @@ class TokenManager:
         self.stored_credentials_failed = set()
 
     def validate_token(self, token: str) -> bool:
+        import jwt
+
         try:
             decoded = jwt.decode(token, options={"verify_signature": False})
             exp_timestamp = decoded.get('exp')
@@ -87,28 +134,19 @@ class TokenManager:
             'Referer': 'https://fantasy.top/',
         }
         
-        for attempt in range(2):
-            try:
-                response = self.api.session.get(
-                    'https://fantasy.top/api/get-player-basic-data',
-                    params={"playerId": wallet_address},
-                    headers=headers,
-                    proxies=self.api.proxies,
-                    timeout=10
-                )
-                
-                if response.status_code == 429:
-                    rate_limit_log(f'Rate limit hit while testing token for account {account_number}')
-                    sleep(self.rate_limit_delay)
-                    continue
-                    
-                return response.status_code == 200
-                
-            except requests.exceptions.RequestException:
-                sleep(1)
-                continue
-                
-        return False
+        policy = self.api.retry_policy.with_attempts(self.max_retries)
+        try:
+            response = policy.call(lambda: self.api.session.get(
+                'https://fantasy.top/api/get-player-basic-data',
+                params={"playerId": wallet_address},
+                headers=headers,
+                proxies=self.api.proxies,
+                timeout=10
+            ), f'token test for account {account_number}', endpoint='get-player-basic-data')
+        except (requests.exceptions.RequestException, CircuitOpenError):
+            return False
+
+        return response.status_code == 200
 
     def try_stored_credentials(self, wallet_address: str, account_number: int) -> Tuple[bool, Optional[str]]:
         is_valid, token, cookies = self.check_stored_credentials(wallet_address)
@@ -122,6 +160,11 @@ class TokenManager:
         token_valid = self._test_token(token, wallet_address, account_number)
         if not token_valid:
             return False, None
+
+        account = self.get_account(wallet_address)
+        if account is not None:
+            account.token = token
+            account.cookies = cookies
             
         return True, token
 
@@ -131,20 +174,32 @@ class TokenManager:
     def should_try_stored_credentials(self, wallet_address: str) -> bool:
         return wallet_address not in self.stored_credentials_failed
 
+    def get_account(self, wallet_address: str):
+        account = self.api.account
+        return account if account is not None and account.address == wallet_address else None
+
+    def get_private_key(self, wallet_address: str) -> Optional[str]:
+        account = self.get_account(wallet_address)
+        if account is not None:
+            return account.private_key
+
+        account_data = self.account_storage.get_account_data(wallet_address)
+        return account_data["private_key"] if account_data else None
+
     def update_credentials(self, wallet_address: str, token: str, cookies: dict):
         self.account_storage.update_account(
             wallet_address,
-            self.account_storage.get_account_data(wallet_address)["private_key"],
+            self.get_private_key(wallet_address),
             token=token,
             cookies=cookies
         )
 
     def invalidate_credentials(self, wallet_address: str):
-        account_data = self.account_storage.get_account_data(wallet_address)
-        if account_data:
+        private_key = self.get_private_key(wallet_address)
+        if private_key:
             self.account_storage.update_account(
                 wallet_address,
-                account_data["private_key"],
+                private_key,
                 token=None,
                 cookies=None
             )
@@ -160,6 +215,8 @@ class CaptchaTokenPool:
     def _get_new_token(self) -> Optional[str]:
         try:
             if self.config['capmonster']['enabled']:
+                from capmonster_python import TurnstileTask
+
                 capmonster = TurnstileTask(self.config['capmonster']['api_key'])
                 task_id = capmonster.create_task(
                     website_url="https://fantasy.top",
@@ -187,8 +244,9 @@ class CaptchaTokenPool:
             return new_token
 
 class FantasyAPI:
-    def __init__(self, web3_provider, session, proxies, all_proxies, config, user_agent, account_storage):
-        self.web3 = Web3(Web3.HTTPProvider(web3_provider))
+    def __init__(self, web3_provider, session, proxies, all_proxies, config, user_agent, account_storage,
+                 result_writer=None, account=None, retry_policy=None):
+        self.web3_provider = web3_provider
         self.session = session
         self.proxies = proxies
         self.all_proxies = all_proxies
@@ -197,60 +255,74 @@ class FantasyAPI:
         self.base_url = "https://fantasy.top"
         self.api_url = "https://api-v2.fantasy.top"
         self.account_storage = account_storage
+        self.account = account
+        self.retry_policy = retry_policy or RetryPolicy.from_config(config)
         self.token_manager = TokenManager(account_storage, self)
         self.captcha_pool = CaptchaTokenPool(config)
+        self.result_writer = result_writer or create_result_writer(config)
+        self.last_status = None
+        self.session.hooks['response'].append(self._record_status)
+
+    @property
+    def web3(self):
+        return get_web3(self.web3_provider, pool_maxsize=self.config['app']['threads'])
+
+    @property
+    def balance_service(self):
+        return get_balance_service(self.web3_provider, pool_maxsize=self.config['app']['threads'])
+
+    @property
+    def receipt_tracker(self):
+        return get_receipt_tracker(self.web3_provider, pool_maxsize=self.config['app']['threads'])
+
+    @property
+    def nonce_manager(self):
+        return get_nonce_manager(self.web3_provider, pool_maxsize=self.config['app']['threads'])
+
+    @property
+    def gas_oracle(self):
+        return get_gas_price_oracle(self.web3_provider, pool_maxsize=self.config['app']['threads'])
+
+    def _record_status(self, response, *args, **kwargs):
+        self.last_status = response.status_code
 
     def _get_captcha_token(self) -> Optional[str]:
         return self.captcha_pool.get_token()
 
     def login(self, private_key, wallet_address, account_number):
-       max_retries = 15
-       retry_delay = 2
+       policy = self.retry_policy
+       single_request = policy.with_attempts(1)
        captcha_token = None
-       
-       for attempt in range(max_retries):
+       result = CallResult.failure()
+
+       for attempt in range(policy.max_attempts):
            try:
-               self.session.headers.update({
-                   'Accept': 'application/json',
-                   'Content-Type': 'application/json',
-                   'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-                   'Origin': self.base_url,
-                   'Referer': f'{self.base_url}/',
-                   'User-Agent': self.user_agent,
-                   'Privy-App-Id': 'clra3wyj700lslb0frokrj261',
-                   'Privy-Client': 'react-auth:1.92.8',
-                   'Privy-Client-Id': 'client-WY2gt82Pt8inAqcq7bpeCwm6Y42kx96jX6hVeVwF8K1qQ',
-                   'Privy-Ca-Id': '315a64ce-afe9-4e58-87ea-3abd2d9a9484',
-                   'Sec-Ch-Ua': '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
-                   'Sec-Ch-Ua-Mobile': '?0',
-                   'Sec-Ch-Ua-Platform': '"Windows"',
-                   'Sec-Fetch-Dest': 'empty',
-                   'Sec-Fetch-Mode': 'cors',
-                   'Sec-Fetch-Site': 'same-site',
-                   'Priority': 'u=1, i'
-               })
+               self.session.headers.update(get_privy_headers(self.base_url, self.user_agent))
 
                if captcha_token is None:
                    captcha_token = self._get_captcha_token()
                    if not captcha_token:
                        error_log(f'Failed to get captcha token for account {account_number}')
-                       sleep(retry_delay)
+                       if not policy.wait(attempt):
+                           break
                        continue
 
-               init_response = self.session.post(
+               init_response = single_request.call(lambda: self.session.post(
                    'https://privy.fantasy.top/api/v1/siwe/init', 
                    json={'address': wallet_address, 'token': captcha_token},
                    headers=self.session.headers,
                    proxies=self.proxies,
                    timeout=10
-               )
+               ), f'login for account {account_number}', endpoint='siwe/init')
                
                if init_response.status_code == 429:
-                   sleep(retry_delay)
-                   continue
+                   return CallResult.from_response(init_response)
                    
                if init_response.status_code != 200:
+                   result = CallResult.from_response(init_response)
                    captcha_token = self._get_captcha_token()
+                   if not policy.wait(attempt, result.retry_after):
+                       break
                    continue
 
                nonce_data = init_response.json()
@@ -266,20 +338,20 @@ class FantasyAPI:
                    'mode': 'login-or-sign-up'
                }
 
-               auth_response = self.session.post(
+               auth_response = single_request.call(lambda: self.session.post(
                    'https://privy.fantasy.top/api/v1/siwe/authenticate',
                    json=auth_payload,
                    proxies=self.proxies,
                    timeout=10
-               )
+               ), f'login for account {account_number}', endpoint='siwe/authenticate')
                
                if auth_response.status_code != 200:
-                   if attempt < max_retries - 1:
-                       proxy = random.choice(self.all_proxies)
-                       self.proxies = {"http": proxy, "https": proxy}
-                       sleep(retry_delay)
-                       continue
-                   return False
+                   result = CallResult.from_response(auth_response)
+                   proxy = random.choice(self.all_proxies)
+                   self.proxies = {"http": proxy, "https": proxy}
+                   if not policy.wait(attempt, result.retry_after):
+                       break
+                   continue
 
                auth_data = auth_response.json()
                if 'token' in auth_data:
@@ -289,7 +361,7 @@ class FantasyAPI:
                
                final_auth_payload = {"address": wallet_address}
                
-               final_auth_response = self.session.post(
+               final_auth_response = single_request.call(lambda: self.session.post(
                    f'{self.base_url}/api/auth/privy',
                    json=final_auth_payload,
                    headers={
@@ -300,15 +372,15 @@ class FantasyAPI:
                    },
                    proxies=self.proxies,
                    timeout=10
-               )
+               ), f'login for account {account_number}', endpoint='auth/privy')
                
                if final_auth_response.status_code != 200:
-                   if attempt < max_retries - 1:
-                       proxy = random.choice(self.all_proxies)
-                       self.proxies = {"http": proxy, "https": proxy}
-                       sleep(retry_delay)
-                       continue
-                   return False
+                   result = CallResult.from_response(final_auth_response)
+                   proxy = random.choice(self.all_proxies)
+                   self.proxies = {"http": proxy, "https": proxy}
+                   if not policy.wait(attempt, result.retry_after):
+                       break
+                   continue
 
                final_auth_data = final_auth_response.json()
                cookies_dict = {cookie.name: cookie.value for cookie in self.session.cookies}
@@ -321,15 +393,15 @@ class FantasyAPI:
                )
                
                info_log(f"Account {account_number}: {wallet_address} Login done")
-               return final_auth_data
+               return CallResult.success(final_auth_data, final_auth_response.status_code)
 
            except Exception as e:
                error_log(f'Error during login attempt {attempt + 1}: {str(e)}')
-               if attempt < max_retries - 1:
-                   sleep(retry_delay)
-                   continue
+               result = CallResult.from_exception(e)
+               if result.circuit_open or not policy.wait(attempt):
+                   break
 
-       return False
+       return result
 
     def get_token(self, auth_data, wallet_address, account_number):
         try:
@@ -342,36 +414,42 @@ class FantasyAPI:
 
             payload = {"address": wallet_address}
 
-            response = self.session.post(
+            response = self.retry_policy.call(lambda: self.session.post(
                 f'{self.base_url}/api/auth/privy',
                 json=payload,
                 headers=headers,
                 proxies=self.proxies,
                 timeout=10
-            )
+            ), f'token request for account {account_number}', endpoint='auth/privy')
 
             if response.status_code == 200:
                 token = response.json().get('token')
                 if token:
                     self.account_storage.update_account(
                         wallet_address,
-                        self.account_storage.get_account_data(wallet_address)["private_key"],
+                        self.token_manager.get_private_key(wallet_address),
                         token=token
                     )
                 info_log(f'Token obtained for account {account_number}: {wallet_address}')
-                return token
+                return CallResult.from_response(response, token)
             
             error_log(f'Token request failed for account {account_number}: {response.status_code}')
-            return False
+            return CallResult.from_response(response)
 
         except Exception as e:
             error_log(f'Token error for account {account_number}: {str(e)}')
-            return False
+            return CallResult.from_exception(e)
+
+    def _relogin(self, wallet_address, account_number):
+        private_key = self.token_manager.get_private_key(wallet_address)
+        if not private_key or self.retry_policy.expired():
+            return None
+        auth_result = self.login(private_key, wallet_address, account_number)
+        if not auth_result:
+            return None
+        return self.get_token(auth_result.value, wallet_address, account_number).value
 
     def daily_claim(self, token, wallet_address, account_number):
-        max_retries = 5
-        retry_delay = 1
-        
         headers = {
             'Accept': 'application/json, text/plain, */*',
             'Authorization': f'Bearer {token}',
@@ -380,88 +458,71 @@ class FantasyAPI:
             'Content-Length': '0'
         }
 
-        while True:
-            try:
-                response = self.session.post(
-                    f'{self.api_url}/quest/daily-claim',
-                    headers=headers,
-                    data="",
-                    proxies=self.proxies,
-                    timeout=10
-                )
+        try:
+            response = self.retry_policy.call(lambda: self.session.post(
+                f'{self.api_url}/quest/daily-claim',
+                headers=headers,
+                data="",
+                proxies=self.proxies,
+                timeout=10
+            ), f'daily claim for account {account_number}', endpoint='quest/daily-claim')
 
-                if response.status_code == 500:
-                    info_log(f'Daily claim returned 500 for account {account_number}, retrying same request...')
-                    sleep(retry_delay)
-                    continue
+            if response.status_code == 201:
+                data = response.json()
+                if data.get("success", False):
+                    self.account_storage.update_account(
+                        wallet_address,
+                        self.token_manager.get_private_key(wallet_address),
+                        last_daily_claim=datetime.now(pytz.UTC).isoformat()
+                    )
+                    daily_streak = data.get("dailyQuestStreak", "N/A")
+                    current_day = data.get("dailyQuestProgress", "N/A")
+                    prize = data.get("selectedPrize", {})
+                    prize_type = prize.get("type", "Unknown")
+                    prize_amount = prize.get("text", "Unknown")
+                    
+                    success_log(f'Account {account_number} ({wallet_address}): '
+                              f'{Fore.GREEN}STREAK:{daily_streak}{Fore.RESET}, '
+                              f'{Fore.GREEN}DAY:{current_day}{Fore.RESET}, '
+                              f'{Fore.GREEN}PRIZE:{prize_type}({prize_amount}){Fore.RESET}')
+                    return CallResult.success(status=response.status_code)
+                else:
+                    next_due_time = data.get("nextDueTime")
+                    if next_due_time:
+                        from dateutil import parser
 
-                if response.status_code == 201:
-                    data = response.json()
-                    if data.get("success", False):
+                        next_due_datetime = parser.parse(next_due_time)
                         self.account_storage.update_account(
                             wallet_address,
-                            self.account_storage.get_account_data(wallet_address)["private_key"],
-                            last_daily_claim=datetime.now(pytz.UTC).isoformat()
+                            self.token_manager.get_private_key(wallet_address),
+                            next_daily_claim=next_due_datetime.replace(tzinfo=pytz.UTC).isoformat()
                         )
-                        daily_streak = data.get("dailyQuestStreak", "N/A")
-                        current_day = data.get("dailyQuestProgress", "N/A")
-                        prize = data.get("selectedPrize", {})
-                        prize_type = prize.get("type", "Unknown")
-                        prize_amount = prize.get("text", "Unknown")
-                        
-                        success_log(f'Account {account_number} ({wallet_address}): '
-                                  f'{Fore.GREEN}STREAK:{daily_streak}{Fore.RESET}, '
-                                  f'{Fore.GREEN}DAY:{current_day}{Fore.RESET}, '
-                                  f'{Fore.GREEN}PRIZE:{prize_type}({prize_amount}){Fore.RESET}')
-                        return True
-                    else:
-                        next_due_time = data.get("nextDueTime")
-                        if next_due_time:
-                            next_due_datetime = parser.parse(next_due_time)
-                            moscow_tz = pytz.timezone('Europe/Moscow')
-                            current_time = datetime.now(moscow_tz)
-                            time_difference = next_due_datetime.replace(tzinfo=pytz.UTC) - current_time.replace(tzinfo=moscow_tz)
-                            hours, remainder = divmod(time_difference.seconds, 3600)
-                            minutes, _ = divmod(remainder, 60)
-                            success_log(f"Account {account_number}: {wallet_address}: Next claim available in {hours}h {minutes}m")
-                        return True
-
-                if response.status_code == 401:
-                    account_data = self.account_storage.get_account_data(wallet_address)
-                    if account_data:
-                        auth_data = self.login(account_data["private_key"], wallet_address, account_number)
-                        if auth_data:
-                            new_token = self.get_token(auth_data, wallet_address, account_number)
-                            if new_token:
-                                return self.daily_claim(new_token, wallet_address, account_number)
-                    return False
-
-                error_log(f'Daily claim failed for account {account_number}: {response.status_code}')
-                return False
+                        moscow_tz = pytz.timezone('Europe/Moscow')
+                        current_time = datetime.now(moscow_tz)
+                        time_difference = next_due_datetime.replace(tzinfo=pytz.UTC) - current_time.replace(tzinfo=moscow_tz)
+                        hours, remainder = divmod(time_difference.seconds, 3600)
+                        minutes, _ = divmod(remainder, 60)
+                        success_log(f"Account {account_number}: {wallet_address}: Next claim available in {hours}h {minutes}m")
+                    return CallResult.success(status=response.status_code)
 
-            except Exception as e:
-                error_log(f'Daily claim error for account {account_number}: {str(e)}')
-                return False
+            if response.status_code == 401:
+                new_token = self._relogin(wallet_address, account_number)
+                if new_token:
+                    return self.daily_claim(new_token, wallet_address, account_number)
+                return CallResult.from_response(response)
 
-    def _create_sign_message(self, wallet_address, nonce):
-        return f"""fantasy.top wants you to sign in with your Ethereum account:
-{wallet_address}
+            error_log(f'Daily claim failed for account {account_number}: {response.status_code}')
+            return CallResult.from_response(response)
 
-By signing, you are proving you own this wallet and logging in. This does not initiate a transaction or cost any fees.
+        except Exception as e:
+            error_log(f'Daily claim error for account {account_number}: {str(e)}')
+            return CallResult.from_exception(e)
 
-URI: https://fantasy.top
-Version: 1
-Chain ID: 81457
-Nonce: {nonce}
-Issued At: {datetime.utcnow().isoformat()}Z
-Resources:
-- https://privy.io"""
+    def _create_sign_message(self, wallet_address, nonce):
+        return create_sign_message(wallet_address, nonce)
 
     def _sign_message(self, message, private_key):
-        return self.web3.eth.account.sign_message(
-            encode_defunct(message.encode('utf-8')),
-            private_key
-        )
+        return sign_message(message, private_key)
 
     def quest_claim(self, token, wallet_address, account_number, quest_id):
         try:
@@ -479,36 +540,32 @@ Resources:
                 "questThresholdId": quest_id
             }
 
-            response = self.session.post(
+            response = self.retry_policy.call(lambda: self.session.post(
                 f'{self.api_url}/quest/claim',
                 json=payload,
                 headers=headers,
                 proxies=self.proxies
-            )
+            ), f'quest claim for account {account_number}', endpoint='quest/claim')
 
             if response.status_code == 201 or response.status_code == 200:
                 success_log(f'Successfully claimed quest {quest_id} for account {account_number}: {wallet_address}')
-                return True
+                return CallResult.success(status=response.status_code)
 
             elif response.status_code == 429:
-                info_log(f'Rate limit on quest claim for account {account_number}, retrying...')
-                return "429"
+                info_log(f'Rate limit on quest claim for account {account_number}')
+                return CallResult.from_response(response)
 
             elif response.status_code == 401:
-                account_data = self.account_storage.get_account_data(wallet_address)
-                if account_data:
-                    auth_data = self.login(account_data["private_key"], wallet_address, account_number)
-                    if auth_data:
-                        new_token = self.get_token(auth_data, wallet_address, account_number)
-                        if new_token:
-                            return self.quest_claim(new_token, wallet_address, account_number, quest_id)
+                new_token = self._relogin(wallet_address, account_number)
+                if new_token:
+                    return self.quest_claim(new_token, wallet_address, account_number, quest_id)
 
             error_log(f'Quest claim failed for account {account_number}: {response.status_code}')
-            return False
+            return CallResult.from_response(response)
 
         except Exception as e:
             error_log(f'Quest claim error for account {account_number}: {str(e)}')
-            return False
+            return CallResult.from_exception(e)
 
     def fragments_claim(self, token, wallet_address, account_number, fragment_id):
         try:
@@ -520,33 +577,29 @@ Resources:
                 'Content-Length': '0'
             }
 
-            response = self.session.post(
+            response = self.retry_policy.call(lambda: self.session.post(
                 f'{self.api_url}/quest/onboarding/complete/{fragment_id}',
                 headers=headers,
                 data="",
                 proxies=self.proxies,
                 timeout=10
-            )
+            ), f'fragment claim for account {account_number}', endpoint='quest/onboarding/complete')
 
             if response.status_code == 401:
-                account_data = self.account_storage.get_account_data(wallet_address)
-                if account_data:
-                    auth_data = self.login(account_data["private_key"], wallet_address, account_number)
-                    if auth_data:
-                        new_token = self.get_token(auth_data, wallet_address, account_number)
-                        if new_token:
-                            return self.fragments_claim(new_token, wallet_address, account_number, fragment_id)
+                new_token = self._relogin(wallet_address, account_number)
+                if new_token:
+                    return self.fragments_claim(new_token, wallet_address, account_number, fragment_id)
 
             if response.status_code == 201:
                 success_log(f'Successfully claimed fragment {fragment_id} for account {account_number}: {wallet_address}')
-                return True
+                return CallResult.success(status=response.status_code)
 
             error_log(f'Fragment claim failed for account {account_number}: {response.status_code}')
-            return False
+            return CallResult.from_response(response)
 
         except Exception as e:
             error_log(f'Fragment claim error for account {account_number}: {str(e)}')
-            return False
+            return CallResult.from_exception(e)
 
     def info(self, token, wallet_address, account_number):
         try:
@@ -558,54 +611,28 @@ Resources:
                 'User-Agent': self.user_agent
             }
 
-            response = self.session.get(
+            response = self.retry_policy.call(lambda: self.session.get(
                 f'{self.api_url}/player/basic-data/{wallet_address}',
                 headers=headers,
                 proxies=self.proxies
-            )
+            ), f'info check for account {account_number}', endpoint='player/basic-data')
 
             if response.status_code == 200:
-                data = response.json()
-                player_data = data.get('players_by_pk', {})
-                rewards_status = "true" if data.get('rewards', []) else "false"
-                
-                result_file = self.config['app']['result_file']
-                existing_addresses = set()
-                if os.path.exists(result_file):
-                    with open(result_file, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            addr = line.split(':')[0]
-                            existing_addresses.add(addr)
-                
-                gold_value = player_data.get('gold', '0')
-                
-                result_line = (
-                    f"{wallet_address}:"
-                    f"stars={player_data.get('stars', 0)}:"
-                    f'gold="{gold_value}":'
-                    f"portfolio_value={player_data.get('portfolio_value', 'None')}:"
-                    f"number_of_cards={player_data.get('number_of_cards', '0')}:"
-                    f"fantasy_points={player_data.get('fantasy_points', 0)}:"
-                    f"rewards={rewards_status}"
-                )
-
-                if wallet_address not in existing_addresses:
-                    with open(result_file, 'a', encoding='utf-8') as f:
-                        f.write(result_line + '\n')
+                self.result_writer.write(wallet_address, response.json())
 
                 success_log(f"Info collected for account {account_number}: {wallet_address}")
-                return True
+                return CallResult.success(status=response.status_code)
                 
             elif response.status_code == 429:
-                info_log(f'Rate limit on info check for account {account_number}, retrying...')
-                return "429"
+                info_log(f'Rate limit on info check for account {account_number}')
+                return CallResult.from_response(response)
 
             error_log(f'Error getting info for account {account_number}: {response.status_code}')
-            return False
+            return CallResult.from_response(response)
 
         except Exception as e:
             error_log(f"Error in info function for account {account_number}: {str(e)}")
-            return False
+            return CallResult.from_exception(e)
             
     def get_headers(self, token=None):
         headers = {
@@ -625,9 +652,8 @@ Resources:
 
     def check_eth_balance(self, address):
         try:
-            balance_wei = self.web3.eth.get_balance(address)
-            balance_eth = float(self.web3.from_wei(balance_wei, 'ether'))
-            return balance_eth
+            balance_wei = self.balance_service.get_balance(address)
+            return balance_wei / 10 ** 18
         except Exception as e:
             error_log(f'Error checking balance for {address}: {str(e)}')
             return 0
@@ -641,102 +667,151 @@ Resources:
             'User-Agent': self.user_agent
         }
 
-        max_attempts = 15
-        delay_between_attempts = 5
+        policy = self.retry_policy.with_attempts(self.config['tactic'].get('max_toggle_attempts', 15))
+        single_request = policy.with_attempts(1)
+        result = CallResult.failure()
 
-        for attempt in range(max_attempts):
+        for attempt in range(policy.max_attempts):
             try:
-                info_log(f'Toggle attempt {attempt + 1}/{max_attempts} for account {account_number}')
-                response = self.session.post(
+                info_log(f'Toggle attempt {attempt + 1}/{policy.max_attempts} for account {account_number}')
+                response = single_request.call(lambda: self.session.post(
                     'https://api-v2.fantasy.top/tactics/toggle-can-play-free-tactics', 
                     headers=headers, 
                     proxies=self.proxies
-                )
+                ), f'tactics toggle for account {account_number}', endpoint='tactics/toggle-can-play-free-tactics')
                 
                 if response.status_code == 201:
                     data = response.json()
                     if data.get('can_play_free_tactics', False):
                         success_log(f'Got TRUE status for account {account_number}: {wallet_address}')
-                        return True
+                        return CallResult.success(status=response.status_code)
                     else:
                         info_log(f'Attempt {attempt + 1}: Status still FALSE for account {account_number}')
-                        sleep(delay_between_attempts)
+                        result = CallResult.failure(response.status_code)
                 else:
                     error_log(f'Toggle request failed: {response.status_code}')
-                    sleep(delay_between_attempts)
+                    result = CallResult.from_response(response)
 
             except Exception as e:
                 error_log(f'Toggle attempt {attempt + 1} error: {str(e)}')
-                sleep(delay_between_attempts)
+                result = CallResult.from_exception(e)
 
-        return False
+            if result.circuit_open or not policy.wait(attempt, result.retry_after):
+                break
+
+        return result
+
+    def wait_for_balance(self, address, required_balance, max_attempts=None, check_delay=None):
+        if max_attempts is None:
+            max_attempts = self.config['app'].get('max_balance_checks', 30)
+        if check_delay is None:
+            check_delay = self.config['app'].get('balance_check_delay', 3)
+
+        info_log(f'Waiting for balance of {address} to reach {required_balance} ETH')
+        balance_wei = self.balance_service.wait_for_balance(
+            address,
+            int(required_balance * 10 ** 18),
+            max_attempts=max_attempts,
+            check_delay=check_delay
+        )
+
+        if balance_wei is not None:
+            success_log(f'Required balance reached for {address}: {balance_wei / 10 ** 18} ETH')
+            return True
 
-    def wait_for_balance(self, address, required_balance, max_attempts=30, check_delay=3):
-        for attempt in range(max_attempts):
-            current_balance = self.check_eth_balance(address)
-            info_log(f'Balance check attempt {attempt + 1}/{max_attempts} for {address}: {current_balance} ETH')
-            
-            if current_balance >= required_balance:
-                success_log(f'Required balance reached for {address}: {current_balance} ETH')
-                return True
-                
-            info_log(f'Waiting for balance... Current: {current_balance} ETH, Required: {required_balance} ETH')
-            sleep(check_delay)
-        
         error_log(f'Balance never reached required amount for {address}')
         return False
 
+    def _send_transfer(self, from_private_key, from_address, to_address, attempt):
+        base_gas_reserve = 0.000003
+
+        try:
+            balance_wei = self.balance_service.get_balance(from_address)
+            balance_eth = balance_wei / 10 ** 18
+            
+            current_gas_reserve = base_gas_reserve * (attempt + 1)
+            
+            transfer_amount = balance_eth - current_gas_reserve
+            
+            if transfer_amount <= 0:
+                error_log(f'Insufficient balance for transfer from {from_address} (attempt {attempt + 1})')
+                return None
+
+            if transfer_amount < self.config['app']['min_balance']:
+                error_log(f'Transfer amount too small: {transfer_amount} ETH (attempt {attempt + 1})')
+                return None
+
+            transaction = {
+                'nonce': self.nonce_manager.next_nonce(from_address),
+                'to': self.web3.to_checksum_address(to_address),
+                'value': self.web3.to_wei(transfer_amount, 'ether'),
+                'gas': 21000,
+                'maxFeePerGas': self.gas_oracle.get_gas_price() * (2 + attempt),
+                'maxPriorityFeePerGas': self.web3.to_wei(0.00000005 * (1 + attempt), 'gwei'),
+                'type': 2,
+                'chainId': 81457
+            }
+
+            signed_txn = self.web3.eth.account.sign_transaction(transaction, from_private_key)
+            tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction).hex()
+            
+            success_log(f'Sending {transfer_amount} ETH from {from_address} to {to_address} (attempt {attempt + 1})')
+            success_log(f'TX Hash: {tx_hash}')
+            self.balance_service.invalidate(from_address)
+            return tx_hash
+
+        except Exception as e:
+            error_log(f'Transfer error (attempt {attempt + 1}): {str(e)}')
+            self.nonce_manager.invalidate(from_address)
+            self.gas_oracle.invalidate()
+            return None
+
+    def _log_transfer_receipt(self, tx_hash, from_address, future):
+        try:
+            receipt = future.result()
+        except Exception as e:
+            error_log(f'Transfer not confirmed: {tx_hash} ({str(e)})')
+            self.nonce_manager.invalidate(from_address)
+            return
+
+        if int(receipt.get('status', '0x0'), 16) == 1:
+            success_log(f'Transfer confirmed: {tx_hash}')
+        else:
+            error_log(f'Transfer failed: {tx_hash}')
+
+    def submit_transfer(self, from_private_key, from_address, to_address, max_retries=3):
+        for attempt in range(max_retries):
+            tx_hash = self._send_transfer(from_private_key, from_address, to_address, attempt)
+            if tx_hash:
+                future = self.receipt_tracker.track(tx_hash, timeout=180)
+                future.add_done_callback(lambda f: self._log_transfer_receipt(tx_hash, from_address, f))
+                return future
+            if attempt < max_retries - 1:
+                sleep(2)
+        return None
+
     def transfer_eth(self, from_private_key, from_address, to_address):
         max_retries = 3
-        base_gas_reserve = 0.000003
         
         for attempt in range(max_retries):
-            try:
-                balance_wei = self.web3.eth.get_balance(from_address)
-                balance_eth = float(self.web3.from_wei(balance_wei, 'ether'))
-                
-                current_gas_reserve = base_gas_reserve * (attempt + 1)
-                
-                transfer_amount = balance_eth - current_gas_reserve
-                
-                if transfer_amount <= 0:
-                    error_log(f'Insufficient balance for transfer from {from_address} (attempt {attempt + 1})')
-                    continue
-
-                if transfer_amount < self.config['app']['min_balance']:
-                    error_log(f'Transfer amount too small: {transfer_amount} ETH (attempt {attempt + 1})')
-                    continue
-
-                transaction = {
-                    'nonce': self.web3.eth.get_transaction_count(from_address),
-                    'to': self.web3.to_checksum_address(to_address),
-                    'value': self.web3.to_wei(transfer_amount, 'ether'),
-                    'gas': 21000,
-                    'maxFeePerGas': self.web3.eth.gas_price * (2 + attempt),
-                    'maxPriorityFeePerGas': self.web3.to_wei(0.00000005 * (1 + attempt), 'gwei'),
-                    'type': 2,
-                    'chainId': 81457
-                }
-
-                signed_txn = self.web3.eth.account.sign_transaction(transaction, from_private_key)
-                tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-                
-                success_log(f'Sending {transfer_amount} ETH from {from_address} to {to_address} (attempt {attempt + 1})')
-                success_log(f'TX Hash: {tx_hash.hex()}')
-                
-                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=180)
-                if receipt['status'] == 1:
-                    success_log(f'Transfer confirmed: {tx_hash.hex()}')
-                    return True
-                else:
-                    error_log(f'Transfer failed: {tx_hash.hex()} (attempt {attempt + 1})')
-                    continue
+            tx_hash = self._send_transfer(from_private_key, from_address, to_address, attempt)
+            if not tx_hash:
+                if attempt < max_retries - 1:
+                    sleep(2)
+                continue
 
+            try:
+                receipt = self.receipt_tracker.track(tx_hash, timeout=180).result()
             except Exception as e:
                 error_log(f'Transfer error (attempt {attempt + 1}): {str(e)}')
-                if attempt < max_retries - 1:
-                    sleep(2)
+                self.nonce_manager.invalidate(from_address)
                 continue
+
+            if int(receipt.get('status', '0x0'), 16) == 1:
+                success_log(f'Transfer confirmed: {tx_hash}')
+                return True
+
+            error_log(f'Transfer failed: {tx_hash} (attempt {attempt + 1})')
         
         return False
 
@@ -752,29 +827,24 @@ Resources:
                 _, target_address = lines[next_account - 1].strip().split(':')
                 
                 for attempt in range(max_transfer_attempts):
-                    try:
-                        transfer_success = self.transfer_eth(private_key, wallet_address, target_address)
-                        if transfer_success:
-                            success_log(f'Successfully transferred from account {account_number} to {next_account}')
-                            return True
-                        
-                        error_log(f'Transfer attempt {attempt + 1} failed, retrying...')
+                    transfer_future = self.submit_transfer(private_key, wallet_address, target_address)
+                    if transfer_future:
+                        success_log(f'Submitted transfer from account {account_number} to {next_account}')
+                        return True
+                    
+                    error_log(f'Transfer attempt {attempt + 1} failed, retrying...')
+                    if attempt < max_transfer_attempts - 1:
                         sleep(transfer_delay)
-                        
-                    except Exception as e:
-                        error_log(f'Transfer attempt {attempt + 1} error: {str(e)}')
-                        if attempt < max_transfer_attempts - 1:
-                            sleep(transfer_delay)
-                        continue
                 
                 error_log(f'All transfer attempts failed for account {account_number} to {next_account}')
         return False
 
     def tactic_claim(self, token, wallet_address, account_number, total_accounts, old_account_flag):
         success = False
+        failure = CallResult.failure()
         try:
             if old_account_flag:
-                private_key = self.account_storage.get_account_data(wallet_address)["private_key"]
+                private_key = self.token_manager.get_private_key(wallet_address)
                 balance = self.check_eth_balance(wallet_address)
                 
                 if balance < self.config['app']['min_balance']:
@@ -788,8 +858,8 @@ Resources:
                             prev_balance = self.check_eth_balance(prev_address)
                             
                             if prev_balance >= self.config['app']['min_balance']:
-                                transfer_success = self.transfer_eth(prev_private_key, prev_address, wallet_address)
-                                if not transfer_success or not self.wait_for_balance(wallet_address, self.config['app']['min_balance']):
+                                transfer_future = self.submit_transfer(prev_private_key, prev_address, wallet_address)
+                                if not transfer_future or not self.wait_for_balance(wallet_address, self.config['app']['min_balance']):
                                     info_log(f'Failed to transfer or reach required balance for account {account_number}')
                             else:
                                 info_log(f'Previous account {prev_account} has insufficient balance: {prev_balance} ETH')
@@ -806,13 +876,13 @@ Resources:
             }
 
             register_payload = {"tactic_id": self.config['tactic']['id']}
-            register_response = self.session.post(
+            register_response = self.retry_policy.call(lambda: self.session.post(
                 f'{self.api_url}/tactics/register',
                 json=register_payload,
                 headers=headers,
                 proxies=self.proxies,
                 timeout=15
-            )
+            ), f'tactic registration for account {account_number}', endpoint='tactics/register')
 
             if register_response.status_code == 400:
                 success_log(f'Already registered in tactic {account_number}')
@@ -825,11 +895,11 @@ Resources:
                         success = True
 
                         entry_id = response_data["id"]
-                        deck_response = self.session.get(
+                        deck_response = self.retry_policy.call(lambda: self.session.get(
                             f'{self.api_url}/tactics/entry/{entry_id}/choices',
                             headers=self.get_headers(token),
                             proxies=self.proxies
-                        )
+                        ), f'tactic deck for account {account_number}', endpoint='tactics/entry/choices')
                                 
                         if deck_response.status_code == 200:
                             deck = deck_response.json()
@@ -859,12 +929,12 @@ Resources:
                                         "heroChoices": hero_choices
                                     }
 
-                                    save_response = self.session.post(
+                                    save_response = self.retry_policy.call(lambda: self.session.post(
                                         f'{self.api_url}/tactics/save-deck',
                                         json=save_payload,
                                         headers=headers,
                                         proxies=self.proxies
-                                    )
+                                    ), f'tactic deck save for account {account_number}', endpoint='tactics/save-deck')
 
                                     if save_response.status_code == 200:
                                         success_log(f'Deck saved for account {account_number}')
@@ -876,6 +946,7 @@ Resources:
         except Exception as e:
             error_log(f'Tactic claim error for account {account_number}: {str(e)}')
             success = False
+            failure = CallResult.from_exception(e)
         
         finally:
             if old_account_flag:
@@ -884,7 +955,7 @@ Resources:
                 except Exception as e:
                     error_log(f'Transfer error after tactic for account {account_number}: {str(e)}')
             
-            return success
+            return CallResult.success() if success else failure
 
     def _get_deck_for_account(self, account_number: int, total_accounts: int):
         accounts_per_deck = math.ceil(total_accounts / len(self.config['tactic']['decks']))
@@ -0,0 +1,734 @@
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+import aiohttp
+import pytz
+from colorama import Fore
+from .api import (
+    TokenManager,
+    CaptchaTokenPool,
+    get_privy_headers,
+    create_sign_message,
+    sign_message
+)
+from .main import FantasyProcessor, PARKED, FINAL_FAILED
+from .retry_policy import CallResult, RetryPolicy, parse_retry_after
+from .circuit_breaker import CircuitOpenError
+from .checkpoint import AUTHENTICATED, DAILY_CLAIMED, INFO_COLLECTED, FRAGMENTS_CLAIMED, TACTIC_SAVED, quest_stage
+from .utils import error_log, success_log, info_log
+
+NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class AsyncFantasyAPI:
+    def __init__(self, http, proxy, all_proxies, config, user_agent, account_storage, captcha_pool,
+                 result_writer, account=None, retry_policy=None):
+        self.http = http
+        self.proxy = proxy
+        self.all_proxies = all_proxies
+        self.config = config
+        self.user_agent = user_agent
+        self.base_url = "https://fantasy.top"
+        self.api_url = "https://api-v2.fantasy.top"
+        self.account_storage = account_storage
+        self.token_manager = TokenManager(account_storage, self)
+        self.captcha_pool = captcha_pool
+        self.result_writer = result_writer
+        self.account = account
+        self.retry_policy = retry_policy or RetryPolicy.from_config(config)
+        self.last_status = None
+
+    async def _request(self, method, url, timeout=10, **kwargs) -> Tuple[int, Optional[dict], Optional[float]]:
+        async with self.http.request(
+            method,
+            url,
+            proxy=self.proxy,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            **kwargs
+        ) as response:
+            self.last_status = response.status
+            retry_after = parse_retry_after(response)
+            body = await response.read()
+
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        return response.status, data, retry_after
+
+    async def _call(self, policy, method, url, label, endpoint, **kwargs):
+        return await policy.call_async(lambda: self._request(method, url, **kwargs), label,
+                                       endpoint=endpoint, errors=NETWORK_ERRORS)
+
+    async def _update_account(self, wallet_address, private_key=None, **fields):
+        await asyncio.to_thread(lambda: self.account_storage.update_account(
+            wallet_address,
+            private_key or self.token_manager.get_private_key(wallet_address),
+            **fields
+        ))
+
+    def _switch_proxy(self):
+        if self.all_proxies:
+            self.proxy = random.choice(self.all_proxies)
+
+    def _cookies_dict(self) -> dict:
+        return {cookie.key: cookie.value for cookie in self.http.cookie_jar}
+
+    async def _test_token(self, token: str, wallet_address: str, account_number: int) -> bool:
+        headers = {
+            'Accept': 'application/json, text/plain, */*',
+            'Authorization': f'Bearer {token}',
+            'Origin': self.base_url,
+            'Referer': f'{self.base_url}/',
+        }
+
+        policy = self.retry_policy.with_attempts(self.token_manager.max_retries)
+        try:
+            status, _, _ = await self._call(
+                policy,
+                'GET',
+                f'{self.base_url}/api/get-player-basic-data',
+                f'token test for account {account_number}',
+                'get-player-basic-data',
+                params={"playerId": wallet_address},
+                headers=headers
+            )
+        except NETWORK_ERRORS + (CircuitOpenError,):
+            return False
+
+        return status == 200
+
+    async def try_stored_credentials(self, wallet_address: str, account_number: int) -> Tuple[bool, Optional[str]]:
+        is_valid, token, cookies = await asyncio.to_thread(self.token_manager.check_stored_credentials, wallet_address)
+        if not is_valid:
+            return False, None
+
+        if cookies:
+            self.http.cookie_jar.update_cookies(cookies)
+
+        if not await self._test_token(token, wallet_address, account_number):
+            return False, None
+
+        account = self.token_manager.get_account(wallet_address)
+        if account is not None:
+            account.token = token
+            account.cookies = cookies
+
+        return True, token
+
+    async def login(self, private_key, wallet_address, account_number):
+        policy = self.retry_policy
+        single_request = policy.with_attempts(1)
+        captcha_token = None
+        result = CallResult.failure()
+        headers = get_privy_headers(self.base_url, self.user_agent)
+
+        for attempt in range(policy.max_attempts):
+            try:
+                if captcha_token is None:
+                    captcha_token = await asyncio.to_thread(self.captcha_pool.get_token)
+                    if not captcha_token:
+                        error_log(f'Failed to get captcha token for account {account_number}')
+                        if not await policy.wait_async(attempt):
+                            break
+                        continue
+
+                status, nonce_data, retry_after = await self._call(
+                    single_request,
+                    'POST',
+                    'https://privy.fantasy.top/api/v1/siwe/init',
+                    f'login for account {account_number}',
+                    'siwe/init',
+                    json={'address': wallet_address, 'token': captcha_token},
+                    headers=headers
+                )
+
+                if status == 429:
+                    return CallResult.failure(status, retry_after)
+
+                if status != 200:
+                    result = CallResult.failure(status, retry_after)
+                    captcha_token = await asyncio.to_thread(self.captcha_pool.get_token)
+                    if not await policy.wait_async(attempt, retry_after):
+                        break
+                    continue
+
+                message = create_sign_message(wallet_address, nonce_data['nonce'])
+                signed_message = sign_message(message, private_key)
+
+                auth_payload = {
+                    'chainId': 'eip155:81457',
+                    'connectorType': 'injected',
+                    'message': message,
+                    'signature': signed_message.signature.hex(),
+                    'walletClientType': 'metamask',
+                    'mode': 'login-or-sign-up'
+                }
+
+                status, auth_data, retry_after = await self._call(
+                    single_request,
+                    'POST',
+                    'https://privy.fantasy.top/api/v1/siwe/authenticate',
+                    f'login for account {account_number}',
+                    'siwe/authenticate',
+                    json=auth_payload,
+                    headers=headers
+                )
+
+                if status != 200:
+                    result = CallResult.failure(status, retry_after)
+                    self._switch_proxy()
+                    if not await policy.wait_async(attempt, retry_after):
+                        break
+                    continue
+
+                if 'token' in auth_data:
+                    self.http.cookie_jar.update_cookies({'privy-token': auth_data['token']})
+                if auth_data.get('identity_token'):
+                    self.http.cookie_jar.update_cookies({'privy-id-token': auth_data['identity_token']})
+
+                status, final_auth_data, retry_after = await self._call(
+                    single_request,
+                    'POST',
+                    f'{self.base_url}/api/auth/privy',
+                    f'login for account {account_number}',
+                    'auth/privy',
+                    json={"address": wallet_address},
+                    headers={
+                        'Accept': 'application/json, text/plain, */*',
+                        'Content-Type': 'application/json',
+                        'Origin': self.base_url,
+                        'Referer': f'{self.base_url}/onboarding/home'
+                    }
+                )
+
+                if status != 200:
+                    result = CallResult.failure(status, retry_after)
+                    self._switch_proxy()
+                    if not await policy.wait_async(attempt, retry_after):
+                        break
+                    continue
+
+                await self._update_account(
+                    wallet_address,
+                    private_key,
+                    token=final_auth_data.get('token'),
+                    cookies=self._cookies_dict()
+                )
+
+                info_log(f"Account {account_number}: {wallet_address} Login done")
+                return CallResult.success(final_auth_data, status)
+
+            except Exception as e:
+                error_log(f'Error during login attempt {attempt + 1}: {str(e)}')
+                result = CallResult.from_exception(e)
+                if result.circuit_open or not await policy.wait_async(attempt):
+                    break
+
+        return result
+
+    async def get_token(self, auth_data, wallet_address, account_number):
+        try:
+            status, data, retry_after = await self._call(
+                self.retry_policy,
+                'POST',
+                f'{self.base_url}/api/auth/privy',
+                f'token request for account {account_number}',
+                'auth/privy',
+                json={"address": wallet_address},
+                headers={
+                    'Accept': 'application/json, text/plain, */*',
+                    'Content-Type': 'application/json',
+                    'Origin': self.base_url,
+                    'Referer': f'{self.base_url}/onboarding/home'
+                }
+            )
+
+            if status == 200:
+                token = (data or {}).get('token')
+                if token:
+                    await self._update_account(
+                        wallet_address,
+                        token=token
+                    )
+                info_log(f'Token obtained for account {account_number}: {wallet_address}')
+                return CallResult.success(token, status) if token else CallResult.failure(status)
+
+            error_log(f'Token request failed for account {account_number}: {status}')
+            return CallResult.failure(status, retry_after)
+
+        except Exception as e:
+            error_log(f'Token error for account {account_number}: {str(e)}')
+            return CallResult.from_exception(e)
+
+    async def _relogin(self, wallet_address, account_number):
+        private_key = await asyncio.to_thread(self.token_manager.get_private_key, wallet_address)
+        if not private_key or self.retry_policy.expired():
+            return None
+        auth_result = await self.login(private_key, wallet_address, account_number)
+        if not auth_result:
+            return None
+        return (await self.get_token(auth_result.value, wallet_address, account_number)).value
+
+    async def daily_claim(self, token, wallet_address, account_number):
+        headers = {
+            'Accept': 'application/json, text/plain, */*',
+            'Authorization': f'Bearer {token}',
+            'Origin': self.base_url,
+            'Referer': f'{self.base_url}/',
+            'Content-Length': '0'
+        }
+
+        try:
+            status, data, retry_after = await self._call(
+                self.retry_policy,
+                'POST',
+                f'{self.api_url}/quest/daily-claim',
+                f'daily claim for account {account_number}',
+                'quest/daily-claim',
+                headers=headers,
+                data=""
+            )
+
+            if status == 201:
+                data = data or {}
+                if data.get("success", False):
+                    await self._update_account(
+                        wallet_address,
+                        last_daily_claim=datetime.now(pytz.UTC).isoformat()
+                    )
+                    prize = data.get("selectedPrize", {})
+                    success_log(f'Account {account_number} ({wallet_address}): '
+                                f'{Fore.GREEN}STREAK:{data.get("dailyQuestStreak", "N/A")}{Fore.RESET}, '
+                                f'{Fore.GREEN}DAY:{data.get("dailyQuestProgress", "N/A")}{Fore.RESET}, '
+                                f'{Fore.GREEN}PRIZE:{prize.get("type", "Unknown")}'
+                                f'({prize.get("text", "Unknown")}){Fore.RESET}')
+                else:
+                    next_due_time = data.get("nextDueTime")
+                    if next_due_time:
+                        from dateutil import parser
+
+                        next_due_datetime = parser.parse(next_due_time).replace(tzinfo=pytz.UTC)
+                        await self._update_account(
+                            wallet_address,
+                            next_daily_claim=next_due_datetime.isoformat()
+                        )
+                        time_difference = next_due_datetime - datetime.now(pytz.UTC)
+                        hours, remainder = divmod(time_difference.seconds, 3600)
+                        minutes, _ = divmod(remainder, 60)
+                        success_log(f"Account {account_number}: {wallet_address}: Next claim available in {hours}h {minutes}m")
+                return CallResult.success(status=status)
+
+            if status == 401:
+                new_token = await self._relogin(wallet_address, account_number)
+                if new_token:
+                    return await self.daily_claim(new_token, wallet_address, account_number)
+                return CallResult.failure(status)
+
+            error_log(f'Daily claim failed for account {account_number}: {status}')
+            return CallResult.failure(status, retry_after)
+
+        except Exception as e:
+            error_log(f'Daily claim error for account {account_number}: {str(e)}')
+            return CallResult.from_exception(e)
+
+    async def quest_claim(self, token, wallet_address, account_number, quest_id):
+        try:
+            status, _, retry_after = await self._call(
+                self.retry_policy,
+                'POST',
+                f'{self.api_url}/quest/claim',
+                f'quest claim for account {account_number}',
+                'quest/claim',
+                json={"playerId": wallet_address, "questThresholdId": quest_id},
+                headers={
+                    'Accept': 'application/json, text/plain, */*',
+                    'Authorization': f'Bearer {token}',
+                    'Content-Type': 'application/json',
+                    'Origin': self.base_url,
+                    'Referer': f'{self.base_url}/',
+                    'User-Agent': self.user_agent
+                }
+            )
+
+            if status in (200, 201):
+                success_log(f'Successfully claimed quest {quest_id} for account {account_number}: {wallet_address}')
+                return CallResult.success(status=status)
+
+            if status == 429:
+                info_log(f'Rate limit on quest claim for account {account_number}')
+                return CallResult.failure(status, retry_after)
+
+            if status == 401:
+                new_token = await self._relogin(wallet_address, account_number)
+                if new_token:
+                    return await self.quest_claim(new_token, wallet_address, account_number, quest_id)
+
+            error_log(f'Quest claim failed for account {account_number}: {status}')
+            return CallResult.failure(status, retry_after)
+
+        except Exception as e:
+            error_log(f'Quest claim error for account {account_number}: {str(e)}')
+            return CallResult.from_exception(e)
+
+    async def fragments_claim(self, token, wallet_address, account_number, fragment_id):
+        try:
+            status, _, retry_after = await self._call(
+                self.retry_policy,
+                'POST',
+                f'{self.api_url}/quest/onboarding/complete/{fragment_id}',
+                f'fragment claim for account {account_number}',
+                'quest/onboarding/complete',
+                data="",
+                headers={
+                    'Accept': 'application/json, text/plain, */*',
+                    'Authorization': f'Bearer {token}',
+                    'Origin': self.base_url,
+                    'Referer': f'{self.base_url}/',
+                    'Content-Length': '0'
+                }
+            )
+
+            if status == 401:
+                new_token = await self._relogin(wallet_address, account_number)
+                if new_token:
+                    return await self.fragments_claim(new_token, wallet_address, account_number, fragment_id)
+
+            if status == 201:
+                success_log(f'Successfully claimed fragment {fragment_id} for account {account_number}: {wallet_address}')
+                return CallResult.success(status=status)
+
+            error_log(f'Fragment claim failed for account {account_number}: {status}')
+            return CallResult.failure(status, retry_after)
+
+        except Exception as e:
+            error_log(f'Fragment claim error for account {account_number}: {str(e)}')
+            return CallResult.from_exception(e)
+
+    async def info(self, token, wallet_address, account_number):
+        try:
+            status, data, retry_after = await self._call(
+                self.retry_policy,
+                'GET',
+                f'{self.api_url}/player/basic-data/{wallet_address}',
+                f'info check for account {account_number}',
+                'player/basic-data',
+                headers={
+                    'Accept': 'application/json, text/plain, */*',
+                    'Authorization': f'Bearer {token}',
+                    'Origin': self.base_url,
+                    'Referer': f'{self.base_url}/',
+                    'User-Agent': self.user_agent
+                }
+            )
+
+            if status == 200:
+                await asyncio.to_thread(self.result_writer.write, wallet_address, data or {})
+                success_log(f"Info collected for account {account_number}: {wallet_address}")
+                return CallResult.success(status=status)
+
+            if status == 429:
+                info_log(f'Rate limit on info check for account {account_number}')
+                return CallResult.failure(status, retry_after)
+
+            error_log(f'Error getting info for account {account_number}: {status}')
+            return CallResult.failure(status, retry_after)
+
+        except Exception as e:
+            error_log(f"Error in info function for account {account_number}: {str(e)}")
+            return CallResult.from_exception(e)
+
+class AsyncFantasyProcessor(FantasyProcessor):
+    def __init__(self, config, proxies_dict, all_proxies, user_agents_cycle, resume=False):
+        super().__init__(config, proxies_dict, all_proxies, user_agents_cycle, resume)
+        self.max_in_flight = config['app'].get('max_in_flight', 200)
+        self.captcha_pool = CaptchaTokenPool(config)
+        self.connector = None
+        self.semaphore = None
+        self.free_slots = []
+
+    def _required_stages(self):
+        return [stage for stage in super()._required_stages() if stage != TACTIC_SAVED]
+
+    async def run(self, accounts, total_accounts):
+        if self.config['tactic']['enabled']:
+            error_log('Tactics are not supported by the async engine, set app.engine to "threads" to run them')
+
+        self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.free_slots = list(range(self.max_in_flight))
+        self.connector = aiohttp.TCPConnector(limit=self.max_in_flight, ttl_dns_cache=300)
+        self.events.auto_flush = False
+        flusher = asyncio.ensure_future(self._flush_events())
+        try:
+            tasks = set()
+            for account in accounts:
+                if len(tasks) >= self.max_in_flight * 2:
+                    _, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                self.retry_manager.add_pending(account)
+                tasks.add(asyncio.ensure_future(
+                    self.process_account_with_retry(account, total_accounts)
+                ))
+            if tasks:
+                await asyncio.wait(tasks)
+            await self.retry_failed_accounts()
+        finally:
+            flusher.cancel()
+            await self.connector.close()
+            await asyncio.get_running_loop().run_in_executor(None, self.events.flush)
+            self.events.auto_flush = True
+
+    async def _flush_events(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.events.flush_interval)
+            await loop.run_in_executor(None, self.events.flush)
+
+    async def _run_delayed(self, schedule, total_accounts):
+        tasks = set()
+        for start_time, account in schedule:
+            delay = start_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= self.max_in_flight * 2:
+                _, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            tasks.add(asyncio.ensure_future(self.process_account_with_retry(account, total_accounts)))
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def _back_off(self, account, result):
+        await asyncio.sleep(self._back_off_delay(account, result))
+
+    async def process_account_with_retry(self, account, total_accounts):
+        if self._skip_completed(account):
+            return
+
+        async with self.semaphore:
+            slot = self.free_slots.pop()
+            try:
+                await self._process_in_slot(account, total_accounts, slot)
+            finally:
+                self.free_slots.append(slot)
+
+    async def _process_in_slot(self, account, total_accounts, slot):
+        proxy_retries = 0
+        account.deadline = time.monotonic() + self.account_deadline
+        while proxy_retries < self.max_proxy_retries and not self._deadline_passed(account):
+            try:
+                success = await self.process_account(account, total_accounts, slot)
+                if success in (PARKED, FINAL_FAILED):
+                    return
+                if success:
+                    self.retry_manager.add_success_account(account)
+                    return
+                proxy_retries += 1
+                await asyncio.sleep(2)
+            except NETWORK_ERRORS as e:
+                error_log(f"Network error for account {account.number}: {str(e)}")
+                proxy_retries += 1
+                await asyncio.sleep(2)
+            except Exception as e:
+                error_log(f"Error processing account {account.number}: {str(e)}")
+                await asyncio.to_thread(self.retry_manager.add_failed_account, account)
+                return
+
+        await asyncio.to_thread(self.retry_manager.add_failed_account, account)
+
+    async def process_account(self, account, total_accounts, slot):
+        max_attempts = 7
+        self.retry_manager.start_attempt(account)
+        current_attempt = self.retry_manager.get_current_attempt(account)
+
+        while current_attempt < max_attempts and not self._deadline_passed(account):
+            wait_time = self._pacing_delay(slot)
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            http = aiohttp.ClientSession(connector=self.connector, connector_owner=False,
+                                         cookie_jar=aiohttp.CookieJar(unsafe=True))
+            try:
+                if current_attempt == 0:
+                    info_log(f'Processing account {account.number}: {account.address}')
+                else:
+                    info_log(f'Retrying account {account.number}: {account.address} (Attempt {current_attempt + 1}/{max_attempts})')
+
+                api = AsyncFantasyAPI(
+                    http=http,
+                    proxy=self._get_random_proxy(),
+                    all_proxies=self.all_proxies,
+                    config=self.config,
+                    user_agent=next(self.user_agents_cycle),
+                    account_storage=self.account_storage,
+                    captcha_pool=self.captcha_pool,
+                    result_writer=self.result_writer,
+                    account=account,
+                    retry_policy=RetryPolicy.from_config(self.config, deadline=account.deadline,
+                                                         breakers=self.breakers)
+                )
+
+                token = None
+
+                if current_attempt == 0:
+                    with self.events.stage('stored_credentials', account.number, current_attempt, api,
+                                           address=account.address) as event:
+                        stored_success, stored_token = await api.try_stored_credentials(account.address, account.number)
+                        event['ok'] = stored_success
+                    if stored_success:
+                        info_log(f'Using stored credentials for account {account.number}')
+                        token = stored_token
+
+                if not token:
+                    with self.events.stage('login', account.number, current_attempt, api,
+                                           address=account.address) as event:
+                        login_result = await api.login(account.private_key, account.address, account.number)
+                        event['ok'] = login_result.ok
+                    if not login_result:
+                        if login_result.circuit_open:
+                            return self._park(account, login_result)
+                        if login_result.rate_limited:
+                            info_log(f'Rate limit on login for account {account.number}, switching proxy...')
+                        current_attempt += 1
+                        await self._back_off(account, login_result)
+                        continue
+
+                    with self.events.stage('get_token', account.number, current_attempt, api,
+                                           address=account.address) as event:
+                        token_result = await api.get_token(login_result.value, account.address, account.number)
+                        event['ok'] = token_result.ok
+                    if not token_result:
+                        if token_result.circuit_open:
+                            return self._park(account, token_result)
+                        current_attempt += 1
+                        await self._back_off(account, token_result)
+                        continue
+                    token = token_result.value
+                    account.token = token
+
+                await asyncio.to_thread(self._mark_stage, account, AUTHENTICATED)
+                tasks_completed = True
+                circuit_result = None
+
+                if self.config['daily']['enabled'] and not self._stage_done(account, DAILY_CLAIMED):
+                    with self.events.stage('daily_claim', account.number, current_attempt, api,
+                                           address=account.address) as event:
+                        daily_result = await api.daily_claim(token, account.address, account.number)
+                        event['ok'] = daily_result.ok
+                    if not daily_result:
+                        if daily_result.rate_limited:
+                            info_log(f'Rate limit on daily claim for account {account.number}, retrying...')
+                            current_attempt += 1
+                            await self._back_off(account, daily_result)
+                            continue
+                        tasks_completed = False
+                        if daily_result.circuit_open:
+                            circuit_result = daily_result
+                    else:
+                        await asyncio.to_thread(self._mark_stage, account, DAILY_CLAIMED)
+                        success_log(f"Account {account.number}: Successfully claimed daily reward")
+
+                if self.config['info_check'] and not self._stage_done(account, INFO_COLLECTED):
+                    with self.events.stage('info', account.number, current_attempt, api,
+                                           address=account.address) as event:
+                        info_result = await api.info(token, account.address, account.number)
+                        event['ok'] = info_result.ok
+                    if not info_result:
+                        if info_result.rate_limited:
+                            info_log(f'Rate limit on info check for account {account.number}, retrying...')
+                            current_attempt += 1
+                            await self._back_off(account, info_result)
+                            continue
+                        tasks_completed = False
+                        if info_result.circuit_open:
+                            circuit_result = info_result
+                    else:
+                        await asyncio.to_thread(self._mark_stage, account, INFO_COLLECTED)
+
+                if self.config['quest']['enabled']:
+                    for quest_id in self.config['quest']['ids']:
+                        if self._stage_done(account, quest_stage(quest_id)):
+                            continue
+                        with self.events.stage('quest', account.number, current_attempt, api,
+                                               address=account.address, quest_id=quest_id) as event:
+                            quest_result = await api.quest_claim(token, account.address, account.number, quest_id)
+                            event['ok'] = quest_result.ok
+                        if not quest_result:
+                            tasks_completed = False
+                            if quest_result.circuit_open:
+                                circuit_result = quest_result
+                        else:
+                            await asyncio.to_thread(self._mark_stage, account, quest_stage(quest_id))
+
+                if self.config['fragments']['enabled'] and not self._stage_done(account, FRAGMENTS_CLAIMED):
+                    fragment_id = self.config['fragments']['id']
+                    with self.events.stage('fragments', account.number, current_attempt, api,
+                                           address=account.address, fragment_id=fragment_id) as event:
+                        fragments_result = await api.fragments_claim(token, account.address, account.number, fragment_id)
+                        event['ok'] = fragments_result.ok
+                    if not fragments_result:
+                        tasks_completed = False
+                        if fragments_result.circuit_open:
+                            circuit_result = fragments_result
+                    else:
+                        await asyncio.to_thread(self._mark_stage, account, FRAGMENTS_CLAIMED)
+
+                if tasks_completed:
+                    await asyncio.to_thread(self._write_success, account.private_key, account.address)
+                    success_log(f"Account {account.number}: {account.address} - All tasks completed successfully")
+                    self.retry_manager.add_success_account(account)
+                    return True
+                elif circuit_result is not None:
+                    return self._park(account, circuit_result)
+
+                current_attempt += 1
+                await asyncio.sleep(2)
+
+            except NETWORK_ERRORS as e:
+                error_log(f'Request error for account {account.number}: {str(e)}')
+                current_attempt += 1
+                await asyncio.sleep(2)
+
+            except Exception as e:
+                error_log(f"Error processing account {account.number}: {str(e)}")
+                current_attempt += 1
+                await asyncio.sleep(2)
+
+            finally:
+                await http.close()
+
+        error_log(f'All attempts exhausted for account {account.number}')
+        await asyncio.to_thread(self._write_failure, account.private_key, account.address)
+        await asyncio.to_thread(self.retry_manager.add_failed_account, account)
+        return False
+
+    async def _drain_retries(self):
+        while self.retry_manager.should_continue_retrying():
+            schedule = self.retry_manager.get_retry_schedule()
+            if not schedule:
+                break
+
+            info_log(f"Retrying {len(schedule)} accounts from current session. Success rate: "
+                     f"{self.retry_manager.get_success_rate()*100:.2f}%")
+            await self._run_delayed(schedule, len(schedule))
+
+    async def retry_failed_accounts(self):
+        await self._drain_retries()
+
+        try:
+            failed_accounts = await asyncio.to_thread(self.failure_ledger.read_entries)
+            await asyncio.to_thread(self.failure_ledger.clear)
+            if failed_accounts:
+                info_log(f"Processing {len(failed_accounts)} unique accounts from failure_accounts.txt...")
+                self.retry_manager.reset_final_failed()
+                await self._run_delayed(self._failure_file_schedule(failed_accounts, self.max_in_flight),
+                                        len(failed_accounts))
+                await self._drain_retries()
+                await asyncio.to_thread(self.retry_manager.fail_unfinished)
+
+                success_rate = self.retry_manager.get_success_rate() * 100
+                info_log(f"Final success rate for failure_accounts.txt: {success_rate:.2f}%")
+            else:
+                info_log("No valid accounts found in failure_accounts.txt")
+
+        except Exception as e:
+            error_log(f"Error processing failure_accounts.txt: {str(e)}")
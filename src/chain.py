@@ -0,0 +1,329 @@
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from .utils import error_log
+
+_web3_instances = {}
+_web3_lock = threading.Lock()
+_services = {}
+_services_lock = threading.Lock()
+
+def create_rpc_session(pool_maxsize: int = 10) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_web3(rpc_url: str, pool_maxsize: int = 10):
+    with _web3_lock:
+        web3 = _web3_instances.get(rpc_url)
+        if web3 is None:
+            from web3 import Web3
+
+            web3 = Web3(Web3.HTTPProvider(rpc_url, session=create_rpc_session(pool_maxsize)))
+            _web3_instances[rpc_url] = web3
+        return web3
+
+def _get_service(service_class, rpc_url: str, pool_maxsize: int):
+    with _services_lock:
+        service = _services.get((service_class, rpc_url))
+        if service is None:
+            service = service_class(RpcClient(rpc_url, session=create_rpc_session(pool_maxsize)))
+            _services[(service_class, rpc_url)] = service
+        return service
+
+def get_balance_service(rpc_url: str, pool_maxsize: int = 10) -> 'BalanceService':
+    return _get_service(BalanceService, rpc_url, pool_maxsize)
+
+def get_receipt_tracker(rpc_url: str, pool_maxsize: int = 10) -> 'ReceiptTracker':
+    return _get_service(ReceiptTracker, rpc_url, pool_maxsize)
+
+def get_nonce_manager(rpc_url: str, pool_maxsize: int = 10) -> 'NonceManager':
+    return _get_service(NonceManager, rpc_url, pool_maxsize)
+
+def get_gas_price_oracle(rpc_url: str, pool_maxsize: int = 10) -> 'GasPriceOracle':
+    return _get_service(GasPriceOracle, rpc_url, pool_maxsize)
+
+class RpcError(Exception):
+    pass
+
+class RpcClient:
+    def __init__(self, rpc_url: str, session: Optional[requests.Session] = None, timeout: float = 15):
+        self.rpc_url = rpc_url
+        self.session = session or create_rpc_session()
+        self.timeout = timeout
+        self.request_ids = itertools.count(1)
+
+    def batch(self, calls: List[tuple]) -> List:
+        if not calls:
+            return []
+
+        requests_payload = [
+            {'jsonrpc': '2.0', 'id': next(self.request_ids), 'method': method, 'params': params}
+            for method, params in calls
+        ]
+        response = self.session.post(self.rpc_url, json=requests_payload, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        if not isinstance(data, list):
+            results = []
+            for payload in requests_payload:
+                response = self.session.post(self.rpc_url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                results.append(response.json())
+            data = results
+
+        by_id = {item.get('id'): item for item in data}
+        results = []
+        for payload in requests_payload:
+            item = by_id.get(payload['id'])
+            if item is None or 'error' in item:
+                raise RpcError(f"{payload['method']} failed: {item.get('error') if item else 'no response'}")
+            results.append(item['result'])
+        return results
+
+    def call(self, method: str, params: list):
+        return self.batch([(method, params)])[0]
+
+    def get_block_number(self) -> int:
+        return int(self.call('eth_blockNumber', []), 16)
+
+class BalanceWaiter:
+    __slots__ = ('address', 'required_wei', 'deadline', 'event', 'balance')
+
+    def __init__(self, address: str, required_wei: int, deadline: float):
+        self.address = address
+        self.required_wei = required_wei
+        self.deadline = deadline
+        self.event = threading.Event()
+        self.balance = None
+
+class BalanceService:
+    def __init__(self, rpc: RpcClient, block_time: float = 2.0, batch_size: int = 100):
+        self.rpc = rpc
+        self.block_time = block_time
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.cache = {}
+        self.cache_block = None
+        self.cache_time = 0.0
+        self.waiters = []
+        self.poll_interval = None
+        self.poller = None
+
+    def get_balances(self, addresses: Iterable[str], fresh: bool = False) -> Dict[str, int]:
+        addresses = list(dict.fromkeys(address.lower() for address in addresses))
+
+        with self.lock:
+            cache_valid = not fresh and time.monotonic() - self.cache_time < self.block_time
+            balances = {address: self.cache[address] for address in addresses
+                        if cache_valid and address in self.cache}
+        missing = [address for address in addresses if address not in balances]
+
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            results = self.rpc.batch(
+                [('eth_blockNumber', [])] + [('eth_getBalance', [address, 'latest']) for address in chunk]
+            )
+            block_number = int(results[0], 16)
+            chunk_balances = {address: int(result, 16) for address, result in zip(chunk, results[1:])}
+            balances.update(chunk_balances)
+
+            with self.lock:
+                if block_number != self.cache_block:
+                    self.cache = {}
+                    self.cache_block = block_number
+                self.cache.update(chunk_balances)
+                self.cache_time = time.monotonic()
+
+        return balances
+
+    def get_balance(self, address: str) -> int:
+        return self.get_balances([address])[address.lower()]
+
+    def invalidate(self, address: str):
+        with self.lock:
+            self.cache.pop(address.lower(), None)
+
+    def wait_for_balance(self, address: str, required_wei: int, max_attempts: int = 30,
+                         check_delay: float = 3) -> Optional[int]:
+        waiter = BalanceWaiter(address.lower(), required_wei, time.monotonic() + max_attempts * check_delay)
+
+        with self.lock:
+            self.waiters.append(waiter)
+            self.poll_interval = min(self.poll_interval or check_delay, check_delay)
+            if self.poller is None or not self.poller.is_alive():
+                self.poller = threading.Thread(target=self._poll_loop, name='balance-poller', daemon=True)
+                self.poller.start()
+
+        waiter.event.wait()
+        return waiter.balance if waiter.balance is not None and waiter.balance >= required_wei else None
+
+    def _poll_loop(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                for waiter in self.waiters:
+                    if waiter.deadline <= now:
+                        waiter.event.set()
+                self.waiters = [waiter for waiter in self.waiters if not waiter.event.is_set()]
+                if not self.waiters:
+                    self.poller = None
+                    self.poll_interval = None
+                    return
+                waiters = list(self.waiters)
+                poll_interval = self.poll_interval
+
+            try:
+                balances = self.get_balances([waiter.address for waiter in waiters], fresh=True)
+                for waiter in waiters:
+                    waiter.balance = balances.get(waiter.address)
+                    if waiter.balance is not None and waiter.balance >= waiter.required_wei:
+                        waiter.event.set()
+            except Exception as e:
+                error_log(f'Error polling balances: {str(e)}')
+
+            time.sleep(poll_interval)
+
+class NonceManager:
+    def __init__(self, rpc: RpcClient):
+        self.rpc = rpc
+        self.lock = threading.Lock()
+        self.address_locks = {}
+        self.nonces = {}
+
+    def _address_lock(self, address: str) -> threading.Lock:
+        with self.lock:
+            return self.address_locks.setdefault(address, threading.Lock())
+
+    def next_nonce(self, address: str) -> int:
+        address = address.lower()
+        with self._address_lock(address):
+            nonce = self.nonces.get(address)
+            if nonce is None:
+                nonce = int(self.rpc.call('eth_getTransactionCount', [address, 'pending']), 16)
+            self.nonces[address] = nonce + 1
+            return nonce
+
+    def invalidate(self, address: str):
+        address = address.lower()
+        with self._address_lock(address):
+            self.nonces.pop(address, None)
+
+class GasPriceOracle:
+    def __init__(self, rpc: RpcClient, ttl: float = 2.0):
+        self.rpc = rpc
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.gas_price = None
+        self.updated_at = 0.0
+
+    def get_gas_price(self) -> int:
+        with self.lock:
+            if self.gas_price is None or time.monotonic() - self.updated_at >= self.ttl:
+                self.gas_price = int(self.rpc.call('eth_gasPrice', []), 16)
+                self.updated_at = time.monotonic()
+            return self.gas_price
+
+    def invalidate(self):
+        with self.lock:
+            self.gas_price = None
+
+class ReceiptTracker:
+    def __init__(self, rpc: RpcClient, poll_interval: float = 2.0, max_blocks_per_poll: int = 20):
+        self.rpc = rpc
+        self.poll_interval = poll_interval
+        self.max_blocks_per_poll = max_blocks_per_poll
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.unchecked = set()
+        self.last_block = None
+        self.watcher = None
+
+    def track(self, tx_hash: str, timeout: float = 180) -> Future:
+        tx_hash = tx_hash.lower()
+        if not tx_hash.startswith('0x'):
+            tx_hash = f'0x{tx_hash}'
+
+        future = Future()
+        with self.lock:
+            if tx_hash in self.pending:
+                return self.pending[tx_hash][0]
+            self.pending[tx_hash] = (future, time.monotonic() + timeout)
+            self.unchecked.add(tx_hash)
+            if self.watcher is None or not self.watcher.is_alive():
+                self.watcher = threading.Thread(target=self._watch_loop, name='receipt-tracker', daemon=True)
+                self.watcher.start()
+        return future
+
+    def _resolve(self, receipts: Dict[str, dict]):
+        with self.lock:
+            resolved = [(self.pending.pop(tx_hash)[0], receipt) for tx_hash, receipt in receipts.items()
+                        if tx_hash in self.pending]
+        for future, receipt in resolved:
+            future.set_result(receipt)
+
+    def _fetch_receipts(self, tx_hashes: List[str]) -> Dict[str, dict]:
+        results = self.rpc.batch([('eth_getTransactionReceipt', [tx_hash]) for tx_hash in tx_hashes])
+        return {tx_hash: receipt for tx_hash, receipt in zip(tx_hashes, results) if receipt}
+
+    def _poll_once(self):
+        block_number = self.rpc.get_block_number()
+        last_block = self.last_block
+        scan_blocks = last_block is not None and last_block < block_number <= last_block + self.max_blocks_per_poll
+
+        with self.lock:
+            if last_block is not None and block_number > last_block and not scan_blocks:
+                lookup = list(self.pending)
+            else:
+                lookup = list(self.unchecked)
+            self.unchecked.clear()
+
+        try:
+            if lookup:
+                self._resolve(self._fetch_receipts(lookup))
+
+            if scan_blocks:
+                blocks = self.rpc.batch([('eth_getBlockByNumber', [hex(number), False])
+                                         for number in range(last_block + 1, block_number + 1)])
+                with self.lock:
+                    included = [tx_hash.lower() for block in blocks if block
+                                for tx_hash in block.get('transactions', []) if tx_hash.lower() in self.pending]
+                if included:
+                    self._resolve(self._fetch_receipts(included))
+        except Exception:
+            with self.lock:
+                self.unchecked.update(tx_hash for tx_hash in lookup if tx_hash in self.pending)
+            raise
+
+        if last_block is None or block_number > last_block:
+            self.last_block = block_number
+
+    def _watch_loop(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                expired = [tx_hash for tx_hash, (_, deadline) in self.pending.items() if deadline <= now]
+                expired_futures = [self.pending.pop(tx_hash)[0] for tx_hash in expired]
+                finished = not self.pending
+                if finished:
+                    self.watcher = None
+                    self.last_block = None
+
+            for future in expired_futures:
+                future.set_exception(TimeoutError('Transaction receipt not found before timeout'))
+            if finished:
+                return
+
+            try:
+                self._poll_once()
+            except Exception as e:
+                error_log(f'Error polling transaction receipts: {str(e)}')
+
+            time.sleep(self.poll_interval)
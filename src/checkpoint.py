@@ -0,0 +1,99 @@
+import atexit
+import os
+import sqlite3
+import threading
+from datetime import datetime
+import pytz
+
+AUTHENTICATED = 'authenticated'
+DAILY_CLAIMED = 'daily_claimed'
+INFO_COLLECTED = 'info_collected'
+QUEST_CLAIMED = 'quest_claimed'
+FRAGMENTS_CLAIMED = 'fragments_claimed'
+TACTIC_SAVED = 'tactic_saved'
+
+def quest_stage(quest_id: str) -> str:
+    return f'{QUEST_CLAIMED}:{quest_id}'
+
+class RunCheckpoint:
+    def __init__(self, checkpoint_file: str = "data/accounts.db", track: bool = True):
+        # Only a resumed run reads checkpoints back; other runs just record them on disk.
+        self.checkpoint_file = checkpoint_file
+        self.track = track
+        self.lock = threading.Lock()
+        self.conn = self._connect()
+        self.run_date = self._today()
+        self.completed = self._load(self.run_date)
+        atexit.register(self.close)
+
+    def _today(self) -> str:
+        return datetime.now(pytz.UTC).date().isoformat()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.checkpoint_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.checkpoint_file, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                address TEXT NOT NULL,
+                run_date TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                completed_at TEXT,
+                PRIMARY KEY (address, run_date, stage)
+            )
+        ''')
+        conn.commit()
+        return conn
+
+    def _load(self, run_date: str) -> dict:
+        with self.lock:
+            self.conn.execute('DELETE FROM checkpoints WHERE run_date < ?', (run_date,))
+            self.conn.commit()
+            if not self.track:
+                return {}
+            rows = self.conn.execute('SELECT address, stage FROM checkpoints WHERE run_date = ?',
+                                     (run_date,)).fetchall()
+
+        completed = {}
+        for address, stage in rows:
+            completed.setdefault(address, set()).add(stage)
+        return completed
+
+    def _roll_over(self):
+        today = self._today()
+        if today != self.run_date:
+            self.run_date = today
+            self.completed = {}
+
+    def is_done(self, address: str, stage: str) -> bool:
+        with self.lock:
+            self._roll_over()
+            return stage in self.completed.get(address, ())
+
+    def mark(self, address: str, stage: str):
+        with self.lock:
+            self._roll_over()
+            if self.track:
+                stages = self.completed.setdefault(address, set())
+                if stage in stages:
+                    return
+                stages.add(stage)
+
+            if self.conn is None:
+                return
+            self.conn.execute(
+                'INSERT OR IGNORE INTO checkpoints (address, run_date, stage, completed_at) VALUES (?, ?, ?, ?)',
+                (address, self.run_date, stage, datetime.now(pytz.UTC).isoformat())
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+        atexit.unregister(self.close)
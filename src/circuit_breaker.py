@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Dict, Optional
+from .utils import error_log, info_log
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f'Circuit open for {endpoint}, retry in {retry_after:.0f}s')
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probing = False
+        error_log(f'Circuit opened for {self.endpoint}, pausing requests for {self.reset_timeout}s')
+
+    def before_request(self):
+        with self.lock:
+            if self.state == CLOSED:
+                return
+
+            if self.state == OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(self.endpoint, remaining)
+                self.state = HALF_OPEN
+                self.probing = False
+
+            if self.probing:
+                raise CircuitOpenError(self.endpoint, self.reset_timeout)
+            self.probing = True
+
+    def record(self, status: Optional[int]):
+        failed = status is None or status >= 500
+        with self.lock:
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self.failures = 0
+                    self.probing = False
+                    info_log(f'Circuit closed for {self.endpoint}')
+                return
+
+            if not failed:
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+class CircuitBreakers:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'CircuitBreakers':
+        return cls(
+            failure_threshold=config['app'].get('circuit_failure_threshold', 5),
+            reset_timeout=config['app'].get('circuit_reset_timeout', 60)
+        )
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self.lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout)
+                self.breakers[endpoint] = breaker
+            return breaker
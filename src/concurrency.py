@@ -0,0 +1,83 @@
+import threading
+from typing import Callable, Dict, Optional
+
+ERROR_STATUSES = (429, 500, 502, 503, 504)
+
+class AdaptiveLimiter:
+    def __init__(self, initial_limit: int, max_limit: int, min_limit: int = 1, window: int = 20,
+                 error_threshold: float = 0.1, decrease_factor: float = 0.5,
+                 on_change: Optional[Callable[[Dict], None]] = None):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = max(self.min_limit, min(initial_limit, self.max_limit))
+        self.window = window
+        self.error_threshold = error_threshold
+        self.decrease_factor = decrease_factor
+        self.on_change = on_change
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.responses = 0
+        self.errors = 0
+        self.error_rate = 0.0
+
+    @classmethod
+    def from_config(cls, config, on_change=None) -> 'AdaptiveLimiter':
+        threads = config['app']['threads']
+        if not config['app'].get('adaptive_concurrency', True):
+            return cls(threads, threads, threads, on_change=on_change)
+        return cls(
+            threads,
+            max(threads, config['app'].get('max_threads', threads)),
+            min_limit=config['app'].get('min_threads', 1),
+            window=config['app'].get('concurrency_window', 20),
+            error_threshold=config['app'].get('concurrency_error_threshold', 0.1),
+            on_change=on_change
+        )
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def record(self, status: int):
+        with self.condition:
+            self.responses += 1
+            if status in ERROR_STATUSES:
+                self.errors += 1
+            if self.responses < self.window:
+                return
+
+            self.error_rate = self.errors / self.responses
+            self.responses = 0
+            self.errors = 0
+
+            previous = self.limit
+            if self.error_rate > self.error_threshold:
+                self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+            else:
+                self.limit = min(self.max_limit, self.limit + 1)
+            if self.limit == previous:
+                return
+
+            self.condition.notify_all()
+            metrics = self._metrics()
+
+        if self.on_change is not None:
+            self.on_change(metrics)
+
+    def _metrics(self) -> Dict:
+        return {
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'error_rate': round(self.error_rate, 4)
+        }
+
+    def metrics(self) -> Dict:
+        with self.condition:
+            return self._metrics()
@@ -0,0 +1,77 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import pytz
+
+class EventLog:
+    def __init__(self, events_file: str = "logs/events.jsonl", batch_size: int = 100, flush_interval: float = 2.0):
+        self.events_file = events_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.auto_flush = True
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def emit(self, stage: str, account_number: int, attempt: int, status=None, duration=None, **fields):
+        if not self.events_file:
+            return
+
+        event = {
+            'ts': datetime.now(pytz.UTC).isoformat(),
+            'stage': stage,
+            'account': account_number,
+            'attempt': attempt,
+            'status': status,
+            'duration_ms': round(duration * 1000, 1) if duration is not None else None
+        }
+        event.update(fields)
+        line = json.dumps(event, default=str)
+
+        with self.lock:
+            self.buffer.append(line)
+            due = len(self.buffer) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval
+        if self.auto_flush and due:
+            self.flush()
+
+    @contextmanager
+    def stage(self, stage: str, account_number: int, attempt: int, api=None, **fields):
+        event = {'ok': False}
+        if api is not None:
+            api.last_status = None
+        start = time.perf_counter()
+        try:
+            yield event
+        except Exception as e:
+            event['error'] = str(e)
+            raise
+        finally:
+            status = api.last_status if api is not None else None
+            fields.update(event)
+            self.emit(stage, account_number, attempt, status=status,
+                      duration=time.perf_counter() - start, **fields)
+
+    def flush(self):
+        # Swap the buffer under the short lock so emit() never waits on file I/O.
+        with self.write_lock:
+            with self.lock:
+                lines, self.buffer = self.buffer, []
+                self.last_flush = time.monotonic()
+            if not lines:
+                return
+
+            directory = os.path.dirname(self.events_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.events_file, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.close)
@@ -0,0 +1,192 @@
+import abc
+import atexit
+import csv
+import io
+import json
+import os
+import threading
+from typing import Dict, List, Tuple
+from .utils import error_log
+
+RESULT_COLUMNS = ('address', 'stars', 'gold', 'portfolio_value', 'number_of_cards', 'fantasy_points', 'rewards')
+
+def _to_number(value, default=None):
+    if value is None or value == '':
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return int(number) if number.is_integer() else number
+
+def format_result_line(wallet_address: str, data: dict) -> str:
+    player_data = data.get('players_by_pk', {})
+    rewards_status = "true" if data.get('rewards', []) else "false"
+    gold_value = player_data.get('gold', '0')
+
+    return (
+        f"{wallet_address}:"
+        f"stars={player_data.get('stars', 0)}:"
+        f'gold="{gold_value}":'
+        f"portfolio_value={player_data.get('portfolio_value', 'None')}:"
+        f"number_of_cards={player_data.get('number_of_cards', '0')}:"
+        f"fantasy_points={player_data.get('fantasy_points', 0)}:"
+        f"rewards={rewards_status}"
+    )
+
+def build_result_row(wallet_address: str, data: dict) -> Dict:
+    player_data = data.get('players_by_pk') or {}
+    return {
+        'address': wallet_address,
+        'stars': _to_number(player_data.get('stars'), 0),
+        'gold': _to_number(player_data.get('gold'), 0),
+        'portfolio_value': _to_number(player_data.get('portfolio_value')),
+        'number_of_cards': _to_number(player_data.get('number_of_cards'), 0),
+        'fantasy_points': _to_number(player_data.get('fantasy_points'), 0),
+        'rewards': bool(data.get('rewards'))
+    }
+
+class IndexedAppender(abc.ABC):
+    def __init__(self, path: str, batch_size: int = 20):
+        self.path = path
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.index = set()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.index = self._load_index(f)
+        atexit.register(self.close)
+
+    @abc.abstractmethod
+    def _load_index(self, f) -> set:
+        pass
+
+    def _add(self, key: str, line: str):
+        self.index.add(key)
+        self.buffer.append(line)
+        if len(self.buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(self.buffer))
+        self.buffer = []
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.close)
+
+class ResultWriter(IndexedAppender):
+    FORMATS = ('txt', 'csv', 'jsonl')
+
+    def __init__(self, result_file: str, result_format: str = 'txt', batch_size: int = 20):
+        if result_format not in self.FORMATS:
+            raise ValueError(f"Unknown result format: {result_format}")
+
+        self.result_format = result_format
+        super().__init__(result_file, batch_size)
+        self.needs_header = result_format == 'csv' and not (
+            os.path.exists(result_file) and os.path.getsize(result_file) > 0
+        )
+
+    def _load_index(self, f) -> set:
+        index = set()
+        if self.result_format == 'csv':
+            for row in csv.DictReader(f):
+                if row.get('address'):
+                    index.add(row['address'])
+        elif self.result_format == 'jsonl':
+            for line in f:
+                try:
+                    index.add(json.loads(line)['address'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+        else:
+            for line in f:
+                if line.strip():
+                    index.add(line.split(':')[0])
+        return index
+
+    def _format(self, wallet_address: str, data: dict) -> str:
+        if self.result_format == 'txt':
+            return format_result_line(wallet_address, data) + '\n'
+
+        row = build_result_row(wallet_address, data)
+        if self.result_format == 'jsonl':
+            return json.dumps(row) + '\n'
+
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=RESULT_COLUMNS, lineterminator='\n')
+        if self.needs_header:
+            writer.writeheader()
+            self.needs_header = False
+        writer.writerow(row)
+        return output.getvalue()
+
+    def write(self, wallet_address: str, data: dict) -> bool:
+        with self.lock:
+            if wallet_address in self.index:
+                return False
+            self._add(wallet_address, self._format(wallet_address, data))
+        return True
+
+class AccountLedger(IndexedAppender):
+    def _load_index(self, f) -> set:
+        index = set()
+        for line in f:
+            parts = line.strip().split(':')
+            if len(parts) == 2:
+                index.add(parts[1])
+        return index
+
+    def add(self, private_key: str, wallet_address: str) -> bool:
+        with self.lock:
+            if wallet_address in self.index:
+                return False
+            self._add(wallet_address, f'{private_key}:{wallet_address}\n')
+        return True
+
+    def read_entries(self) -> List[Tuple[str, str]]:
+        entries = []
+        seen = set()
+        with self.lock:
+            self._flush()
+            if not os.path.exists(self.path):
+                return entries
+
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        private_key, wallet_address = line.strip().split(':')
+                    except ValueError:
+                        error_log(f"Invalid line format in {self.path}: {line.strip()}")
+                        continue
+                    if wallet_address not in seen:
+                        seen.add(wallet_address)
+                        entries.append((private_key, wallet_address))
+        return entries
+
+    def clear(self):
+        with self.lock:
+            self.buffer = []
+            self.index = set()
+            open(self.path, 'w').close()
+
+def create_result_writer(config) -> ResultWriter:
+    return ResultWriter(
+        config['app']['result_file'],
+        result_format=config['app'].get('result_format', 'txt')
+    )
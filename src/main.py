@@ -1,175 +1,413 @@
+import heapq
+import itertools
 import math
 import random
 import time
-import os
 import threading
 import concurrent.futures
 from time import sleep
 import requests
-from web3 import Web3
 from colorama import Fore
 from src.api import FantasyAPI
+from src.retry_policy import RetryPolicy
+from src.concurrency import AdaptiveLimiter
+from src.circuit_breaker import CircuitBreakers
+from src.account import Account
 from src.utils import error_log, info_log, success_log, rate_limit_log
 from src.account_storage import AccountStorage
+from src.events import EventLog
+from src.session_pool import SessionPool
+from src.ledgers import AccountLedger, create_result_writer
+from src.checkpoint import (RunCheckpoint, AUTHENTICATED, DAILY_CLAIMED, INFO_COLLECTED, FRAGMENTS_CLAIMED,
+                            TACTIC_SAVED, quest_stage)
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+SUCCEEDED = 'succeeded'
+RETRY_SCHEDULED = 'retry_scheduled'
+PARKED = 'parked'
+FINAL_FAILED = 'final_failed'
 
 class RetryManager:
-    def __init__(self, max_retries=5, success_threshold=0.9):
-        self.failed_accounts = set()
-        self.success_accounts = set()
-        self.attempt_counter = {}
-        self.stored_credentials_failed = set()
+    STATES = (PENDING, IN_FLIGHT, SUCCEEDED, RETRY_SCHEDULED, PARKED, FINAL_FAILED)
+
+    def __init__(self, max_retries=5, success_threshold=0.9, failure_ledger=None, retry_delay=0):
         self.max_retries = max_retries
         self.success_threshold = success_threshold
+        self.failure_ledger = failure_ledger
+        self.retry_delay = retry_delay
         self.lock = threading.Lock()
-        self.processed_failures = set()
-        self.final_failures = set()
+        self.states = {}
+        self.attempt_counter = {}
+        self.park_counter = {}
+        self.counts = dict.fromkeys(self.STATES, 0)
+        self.failed_count = 0
+        self.ready = []
+        self.ready_entries = {}
+        self.sequence = itertools.count()
+        self.stored_credentials_failed = set()
 
-    def add_failed_account(self, account_data):
+    def _set_state(self, account, state):
+        previous = self.states.get(account)
+        if previous == state:
+            return
+        if previous is not None:
+            self.counts[previous] -= 1
+        if previous in (RETRY_SCHEDULED, PARKED):
+            self.ready_entries.pop(account, None)
+            self._compact()
+        self.states[account] = state
+        self.counts[state] += 1
+
+    def add_pending(self, account):
         with self.lock:
-            if account_data not in self.success_accounts:
-                self.failed_accounts.add(account_data)
-                if account_data not in self.attempt_counter:
-                    self.attempt_counter[account_data] = 1
-                else:
-                    self.attempt_counter[account_data] += 1
-                
-                if self.attempt_counter[account_data] >= self.max_retries:
-                    if account_data not in self.final_failures:
-                        self.final_failures.add(account_data)
-                        self._write_to_fail_file(account_data)
+            if self.states.get(account) is None:
+                self._set_state(account, PENDING)
+
+    def start_attempt(self, account):
+        with self.lock:
+            if account in self.states:
+                self._set_state(account, IN_FLIGHT)
+
+    def _finish(self, account, state):
+        previous = self.states.pop(account)
+        self.counts[previous] -= 1
+        self.counts[state] += 1
+        self.ready_entries.pop(account, None)
+        self._compact()
+        self.attempt_counter.pop(account, None)
+        self.park_counter.pop(account, None)
+        self.stored_credentials_failed.discard(account)
+
+    def add_failed_account(self, account):
+        with self.lock:
+            if account not in self.states:
+                return
+
+            attempts = self.attempt_counter.get(account, 0) + 1
+            if attempts >= self.max_retries:
+                self._fail(account)
+                return
 
-    def _write_to_fail_file(self, account_data):
+            self.attempt_counter[account] = attempts
+            if attempts == 1:
+                self.failed_count += 1
+            self._schedule(account, RETRY_SCHEDULED, self.retry_delay)
+
+    def _fail(self, account):
+        if self.attempt_counter.get(account, 0) == 0:
+            self.failed_count += 1
+        self._finish(account, FINAL_FAILED)
+        self._write_to_fail_file(account)
+
+    def _schedule(self, account, state, delay):
+        self._set_state(account, state)
+        entry = (time.monotonic() + delay, next(self.sequence), account)
+        self.ready_entries[account] = entry
+        heapq.heappush(self.ready, entry)
+        self._compact()
+
+    def _compact(self):
+        if len(self.ready) <= 2 * len(self.ready_entries) + 64:
+            return
+        self.ready = [entry for entry in self.ready if self.ready_entries.get(entry[2]) is entry]
+        heapq.heapify(self.ready)
+
+    def park(self, account, delay):
+        with self.lock:
+            if account not in self.states:
+                return True
+            parks = self.park_counter.get(account, 0) + 1
+            if parks > self.max_retries:
+                self._fail(account)
+                return False
+            self.park_counter[account] = parks
+            self._schedule(account, PARKED, delay)
+            return True
+
+    def _write_to_fail_file(self, account):
+        if self.failure_ledger is None:
+            return
         try:
-            _, private_key, wallet_address = account_data
-            fail_file_path = "logs/failure_accounts.txt"
-            
-            existing_entries = set()
-            if os.path.exists(fail_file_path):
-                with open(fail_file_path, "r") as f:
-                    existing_entries = set(f.readlines())
-            
-            new_entry = f"{private_key}:{wallet_address}\n"
-            
-            if new_entry not in existing_entries:
-                with open(fail_file_path, "a") as f:
-                    f.write(new_entry)
-                
+            self.failure_ledger.add(account.private_key, account.address)
         except Exception as e:
             error_log(f"Error writing to fail file: {str(e)}")
 
-    def add_success_account(self, account_data):
+    def add_success_account(self, account):
+        with self.lock:
+            if account not in self.states:
+                return
+            if self.attempt_counter.get(account, 0) > 0:
+                self.failed_count -= 1
+            self._finish(account, SUCCEEDED)
+
+    def reset_account(self, account):
+        with self.lock:
+            state = self.states.pop(account, None)
+            if state is None:
+                return
+            self.counts[state] -= 1
+            self.ready_entries.pop(account, None)
+            if self.attempt_counter.pop(account, 0) > 0:
+                self.failed_count -= 1
+            self.park_counter.pop(account, None)
+            self._compact()
+
+    def parked_delay(self, account):
         with self.lock:
-            self.success_accounts.add(account_data)
-            if account_data in self.failed_accounts:
-                self.failed_accounts.remove(account_data)
-            if account_data in self.final_failures:
-                self.final_failures.remove(account_data)
-            if account_data in self.stored_credentials_failed:
-                self.stored_credentials_failed.remove(account_data)
-            self.processed_failures.add(account_data)
-
-    def mark_stored_credentials_failed(self, account_data):
+            entry = self.ready_entries.get(account)
+            if self.states.get(account) != PARKED or entry is None:
+                return None
+            return max(0.0, entry[0] - time.monotonic())
+
+    def fail_unfinished(self):
         with self.lock:
-            self.stored_credentials_failed.add(account_data)
+            for account, state in list(self.states.items()):
+                if state in (RETRY_SCHEDULED, PARKED):
+                    self._fail(account)
 
-    def should_try_stored_credentials(self, account_data):
-        return account_data not in self.stored_credentials_failed
+    def reset_final_failed(self):
+        with self.lock:
+            self.failed_count -= self.counts[FINAL_FAILED]
+            self.counts[FINAL_FAILED] = 0
 
-    def get_retry_accounts(self):
+    def mark_stored_credentials_failed(self, account):
         with self.lock:
-            return [acc for acc in self.failed_accounts 
-                   if self.attempt_counter[acc] < self.max_retries 
-                   and acc not in self.final_failures]
+            self.stored_credentials_failed.add(account)
 
-    def get_current_attempt(self, account_data):
+    def should_try_stored_credentials(self, account):
+        with self.lock:
+            return account not in self.stored_credentials_failed
+
+    def _pop_ready(self):
+        while self.ready:
+            entry = heapq.heappop(self.ready)
+            next_attempt, _, account = entry
+            if self.ready_entries.get(account) is entry:
+                del self.ready_entries[account]
+                self._set_state(account, PENDING)
+                return next_attempt, account
+        return None
+
+    def get_retry_schedule(self):
+        with self.lock:
+            schedule = []
+            entry = self._pop_ready()
+            while entry is not None:
+                schedule.append(entry)
+                entry = self._pop_ready()
+            return schedule
+
+    def get_current_attempt(self, account):
         with self.lock:
-            return self.attempt_counter.get(account_data, 0)
+            return self.attempt_counter.get(account, 0)
+
+    def _success_rate(self):
+        total = self.counts[SUCCEEDED] + self.failed_count
+        return self.counts[SUCCEEDED] / total if total > 0 else 0
 
     def get_success_rate(self):
-        total = len(self.success_accounts) + len(self.failed_accounts)
-        return len(self.success_accounts) / total if total > 0 else 0
+        with self.lock:
+            return self._success_rate()
 
     def should_continue_retrying(self):
-        return (self.get_success_rate() < self.success_threshold and 
-                bool(self.get_retry_accounts()))
+        with self.lock:
+            if self.counts[PARKED] > 0:
+                return True
+            return self._success_rate() < self.success_threshold and self.counts[RETRY_SCHEDULED] > 0
 
-    def get_unprocessed_failures(self):
+    def get_counts(self):
         with self.lock:
-            return [acc for acc in self.failed_accounts 
-                   if acc not in self.processed_failures]
+            return dict(self.counts)
 
 class FantasyProcessor:
-    def __init__(self, config, proxies_dict, all_proxies, user_agents_cycle):
+    def __init__(self, config, proxies_dict, all_proxies, user_agents_cycle, resume=False):
         self.config = config
+        self.resume = resume
         self.proxies = proxies_dict
         self.all_proxies = all_proxies
         self.user_agents_cycle = user_agents_cycle
-        self.account_storage = AccountStorage()
-        self.last_request_time = {}
+        self.account_storage = AccountStorage(config['app'].get('storage_file', 'data/accounts.db'))
+        self.events = EventLog(config['app'].get('events_file', 'logs/events.jsonl'))
+        self.limiter = AdaptiveLimiter.from_config(config, on_change=self._on_limit_change)
+        self.breakers = CircuitBreakers.from_config(config)
+        self.session_pool = SessionPool(max_idle=self.limiter.max_limit)
+        self.result_writer = create_result_writer(config)
+        self.success_ledger = AccountLedger(config['app']['success_file'])
+        self.failure_ledger = AccountLedger(config['app']['failure_file'])
+        self.checkpoint = RunCheckpoint(
+            config['app'].get('checkpoint_file', config['app'].get('storage_file', 'data/accounts.db')),
+            track=resume
+        )
+        self.next_request_slot = {}
         self.min_request_interval = 2
+        self.pacing_lock = threading.Lock()
+        self.pacing_wait_time = 0.0
         self.lock = threading.Lock()
-        self.retry_manager = RetryManager()
         self.retry_delay = 5
+        self.retry_manager = RetryManager(failure_ledger=self.failure_ledger, retry_delay=self.retry_delay)
         self.max_proxy_retries = 5
+        self.account_deadline = config['app'].get('account_deadline', 600)
+
+    def close(self):
+        self.account_storage.close()
+        self.events.close()
+        self.session_pool.close()
+        self.result_writer.close()
+        self.success_ledger.close()
+        self.failure_ledger.close()
+        self.checkpoint.close()
+
+    def run(self, accounts, total_accounts):
+        threads = self.limiter.max_limit
+        slots = threading.BoundedSemaphore(threads * 2)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            for account in accounts:
+                slots.acquire()
+                self.retry_manager.add_pending(account)
+                future = executor.submit(self.process_account_with_retry, account, total_accounts)
+                future.add_done_callback(lambda _: slots.release())
+
+        self.retry_failed_accounts()
+        info_log(f"Time spent waiting on request pacing: {self.get_pacing_wait_time():.1f}s")
+        metrics = self.limiter.metrics()
+        info_log(f"Concurrency limit at end of run: {metrics['limit']}, error rate: {metrics['error_rate']*100:.1f}%")
+
+    def _on_limit_change(self, metrics):
+        info_log(f"Concurrency limit set to {metrics['limit']} (error rate {metrics['error_rate']*100:.1f}%)")
+        self.events.emit('concurrency', None, None, **metrics)
+
+    def _observe_response(self, response, *args, **kwargs):
+        self.limiter.record(response.status_code)
+
+    def _pacing_delay(self, worker):
+        with self.pacing_lock:
+            current_time = time.monotonic()
+            slot = max(current_time, self.next_request_slot.get(worker, 0))
+            self.next_request_slot[worker] = slot + self.min_request_interval
+            wait_time = slot - current_time
+            self.pacing_wait_time += wait_time
+        return wait_time
 
     def _wait_rate_limit(self, thread_id):
-        current_time = time.time()
-        with self.lock:
-            last_time = self.last_request_time.get(thread_id, 0)
-            time_since_last = current_time - last_time
-            if time_since_last < self.min_request_interval:
-                sleep_time = self.min_request_interval - time_since_last
-                sleep(sleep_time)
-            self.last_request_time[thread_id] = time.time()
+        wait_time = self._pacing_delay(thread_id)
+        if wait_time > 0:
+            sleep(wait_time)
+
+    def get_pacing_wait_time(self):
+        with self.pacing_lock:
+            return self.pacing_wait_time
+
+    def _stage_done(self, account, stage):
+        if stage in account.stages:
+            return True
+        return self.resume and self.checkpoint.is_done(account.address, stage)
+
+    def _mark_stage(self, account, stage):
+        account.stages.add(stage)
+        self.checkpoint.mark(account.address, stage)
+
+    def _required_stages(self):
+        stages = [AUTHENTICATED]
+        if self.config['daily']['enabled']:
+            stages.append(DAILY_CLAIMED)
+        if self.config['info_check']:
+            stages.append(INFO_COLLECTED)
+        if self.config['quest']['enabled']:
+            stages.extend(quest_stage(quest_id) for quest_id in self.config['quest']['ids'])
+        if self.config['fragments']['enabled']:
+            stages.append(FRAGMENTS_CLAIMED)
+        if self.config['tactic']['enabled']:
+            stages.append(TACTIC_SAVED)
+        return stages
+
+    def _skip_completed(self, account):
+        if not all(self._stage_done(account, stage) for stage in self._required_stages()):
+            return False
+        info_log(f'Account {account.number}: {account.address} already completed today, skipping')
+        self.retry_manager.add_success_account(account)
+        return True
 
     def _get_random_proxy(self):
         with self.lock:
             return random.choice(self.all_proxies)
 
-    def process_account_with_retry(self, account_number, private_key, wallet_address, total_accounts):
-        account_data = (account_number, private_key, wallet_address)
+    def _deadline_passed(self, account):
+        if account.deadline is None or time.monotonic() < account.deadline:
+            return False
+        error_log(f'Deadline of {self.account_deadline}s reached for account {account.number}')
+        return True
+
+    def _back_off_delay(self, account, result):
+        delay = result.retry_after if result.retry_after is not None else 2
+        if account.deadline is not None:
+            delay = min(delay, max(0, account.deadline - time.monotonic()))
+        return delay
+
+    def _back_off(self, account, result):
+        sleep(self._back_off_delay(account, result))
+
+    def _park(self, account, result):
+        if not self.retry_manager.park(account, result.retry_after or 0):
+            error_log(f'Account {account.number}: {result.error}, parked too many times')
+            return FINAL_FAILED
+        info_log(f'Account {account.number}: {result.error}, parking account')
+        return PARKED
+
+    def process_account_with_retry(self, account, total_accounts):
         proxy_retries = 0
+
+        if self._skip_completed(account):
+            return
         
-        while proxy_retries < self.max_proxy_retries:
+        account.deadline = time.monotonic() + self.account_deadline
+        while proxy_retries < self.max_proxy_retries and not self._deadline_passed(account):
             try:
-                success = self.process_account(account_number, private_key, wallet_address, total_accounts)
+                self.limiter.acquire()
+                try:
+                    success = self.process_account(account, total_accounts)
+                finally:
+                    self.limiter.release()
+                if success in (PARKED, FINAL_FAILED):
+                    return
                 if success:
-                    self.retry_manager.add_success_account(account_data)
+                    self.retry_manager.add_success_account(account)
                     return
                 proxy_retries += 1
                 sleep(2)
             except requests.exceptions.RequestException as e:
-                error_log(f"Network error for account {account_number}: {str(e)}")
+                error_log(f"Network error for account {account.number}: {str(e)}")
                 proxy_retries += 1
                 sleep(2)
             except Exception as e:
-                error_log(f"Error processing account {account_number}: {str(e)}")
-                self.retry_manager.add_failed_account(account_data)
+                error_log(f"Error processing account {account.number}: {str(e)}")
+                self.retry_manager.add_failed_account(account)
                 return
 
-        self.retry_manager.add_failed_account(account_data)
+        self.retry_manager.add_failed_account(account)
 
-    def process_account(self, account_number, private_key, wallet_address, total_accounts):
+    def process_account(self, account, total_accounts):
         max_attempts = 7
-        account_data = (account_number, private_key, wallet_address)
-        current_attempt = self.retry_manager.get_current_attempt(account_data)
+        self.retry_manager.start_attempt(account)
+        current_attempt = self.retry_manager.get_current_attempt(account)
         
-        while current_attempt < max_attempts:
+        while current_attempt < max_attempts and not self._deadline_passed(account):
             try:
                 thread_id = threading.get_ident()
                 self._wait_rate_limit(thread_id)
                 
-                session = requests.Session()
+                proxy = self._get_random_proxy()
+                proxy_dict = {"http": proxy, "https": proxy}
+                session = self.session_pool.acquire(proxy)
+                session.hooks['response'].append(self._observe_response)
                 api = None
                 
                 try:
-                    proxy = self._get_random_proxy()
-                    proxy_dict = {"http": proxy, "https": proxy}
-                    
                     if current_attempt == 0:
-                        info_log(f'Processing account {account_number}: {wallet_address}')
+                        info_log(f'Processing account {account.number}: {account.address}')
                     else:
-                        info_log(f'Retrying account {account_number}: {wallet_address} (Attempt {current_attempt + 1}/{max_attempts})')
+                        info_log(f'Retrying account {account.number}: {account.address} (Attempt {current_attempt + 1}/{max_attempts})')
                     
                     with self.lock:
                         user_agent = next(self.user_agents_cycle)
@@ -181,188 +419,233 @@ class FantasyProcessor:
                         all_proxies=self.all_proxies,
                         config=self.config,
                         user_agent=user_agent,
-                        account_storage=self.account_storage
+                        account_storage=self.account_storage,
+                        result_writer=self.result_writer,
+                        account=account,
+                        retry_policy=RetryPolicy.from_config(self.config, deadline=account.deadline,
+                                                             breakers=self.breakers)
                     )
 
                     auth_data = None
                     token = None
                     
                     if current_attempt == 0:
-                        stored_success, stored_token = api.token_manager.try_stored_credentials(wallet_address, account_number)
+                        with self.events.stage('stored_credentials', account.number, current_attempt, api,
+                                               address=account.address) as event:
+                            stored_success, stored_token = api.token_manager.try_stored_credentials(account.address, account.number)
+                            event['ok'] = stored_success
                         if stored_success:
-                            info_log(f'Using stored credentials for account {account_number}')
+                            info_log(f'Using stored credentials for account {account.number}')
                             token = stored_token
 
                     if not token:
-                        auth_data = api.login(private_key, wallet_address, account_number)
-                        if not auth_data:
-                            if "429" in str(auth_data):
-                                info_log(f'Rate limit on login for account {account_number}, switching proxy...')
-                                current_attempt += 1
-                                session.close()
-                                sleep(2)
-                                continue
-                            
+                        with self.events.stage('login', account.number, current_attempt, api,
+                                               address=account.address) as event:
+                            login_result = api.login(account.private_key, account.address, account.number)
+                            event['ok'] = login_result.ok
+                        if not login_result:
+                            if login_result.circuit_open:
+                                return self._park(account, login_result)
+                            if login_result.rate_limited:
+                                info_log(f'Rate limit on login for account {account.number}, switching proxy...')
                             current_attempt += 1
-                            session.close()
-                            sleep(2)
+                            self._back_off(account, login_result)
                             continue
 
-                        token = api.get_token(auth_data, wallet_address, account_number)
-                        if not token:
+                        with self.events.stage('get_token', account.number, current_attempt, api,
+                                               address=account.address) as event:
+                            token_result = api.get_token(login_result.value, account.address, account.number)
+                            event['ok'] = token_result.ok
+                        if not token_result:
+                            if token_result.circuit_open:
+                                return self._park(account, token_result)
                             current_attempt += 1
-                            session.close()
-                            sleep(2)
+                            self._back_off(account, token_result)
                             continue
+                        token = token_result.value
+                        account.token = token
 
+                    self._mark_stage(account, AUTHENTICATED)
                     tasks_completed = True
-
-                    if self.config['daily']['enabled']:
-                        daily_success = api.daily_claim(token, wallet_address, account_number)
-                        if not daily_success:
-                            if "429" in str(daily_success):
-                                info_log(f'Rate limit on daily claim for account {account_number}, retrying...')
-                                sleep(2)
+                    circuit_result = None
+
+                    if self.config['daily']['enabled'] and not self._stage_done(account, DAILY_CLAIMED):
+                        with self.events.stage('daily_claim', account.number, current_attempt, api,
+                                               address=account.address) as event:
+                            daily_result = api.daily_claim(token, account.address, account.number)
+                            event['ok'] = daily_result.ok
+                        if not daily_result:
+                            if daily_result.rate_limited:
+                                info_log(f'Rate limit on daily claim for account {account.number}, retrying...')
+                                current_attempt += 1
+                                self._back_off(account, daily_result)
                                 continue
                             tasks_completed = False
+                            if daily_result.circuit_open:
+                                circuit_result = daily_result
                         else:
-                            success_log(f"Account {account_number}: Successfully claimed daily reward")
-
-                    if self.config['info_check']:
-                        info_success = api.info(token, wallet_address, account_number)
-                        if not info_success:
-                            if "429" in str(info_success):
-                                info_log(f'Rate limit on info check for account {account_number}, retrying...')
+                            self._mark_stage(account, DAILY_CLAIMED)
+                            success_log(f"Account {account.number}: Successfully claimed daily reward")
+
+                    if self.config['info_check'] and not self._stage_done(account, INFO_COLLECTED):
+                        with self.events.stage('info', account.number, current_attempt, api,
+                                               address=account.address) as event:
+                            info_result = api.info(token, account.address, account.number)
+                            event['ok'] = info_result.ok
+                        if not info_result:
+                            if info_result.rate_limited:
+                                info_log(f'Rate limit on info check for account {account.number}, retrying...')
                                 current_attempt += 1
-                                sleep(2)
+                                self._back_off(account, info_result)
                                 continue
                             tasks_completed = False
-                    
+                            if info_result.circuit_open:
+                                circuit_result = info_result
+                        else:
+                            self._mark_stage(account, INFO_COLLECTED)
+
+                    if self.config['quest']['enabled']:
+                        for quest_id in self.config['quest']['ids']:
+                            if self._stage_done(account, quest_stage(quest_id)):
+                                continue
+                            with self.events.stage('quest', account.number, current_attempt, api,
+                                                   address=account.address, quest_id=quest_id) as event:
+                                quest_result = api.quest_claim(token, account.address, account.number, quest_id)
+                                event['ok'] = quest_result.ok
+                            if not quest_result:
+                                tasks_completed = False
+                                if quest_result.circuit_open:
+                                    circuit_result = quest_result
+                            else:
+                                self._mark_stage(account, quest_stage(quest_id))
+
+                    if self.config['fragments']['enabled'] and not self._stage_done(account, FRAGMENTS_CLAIMED):
+                        fragment_id = self.config['fragments']['id']
+                        with self.events.stage('fragments', account.number, current_attempt, api,
+                                               address=account.address, fragment_id=fragment_id) as event:
+                            fragments_result = api.fragments_claim(token, account.address, account.number, fragment_id)
+                            event['ok'] = fragments_result.ok
+                        if not fragments_result:
+                            tasks_completed = False
+                            if fragments_result.circuit_open:
+                                circuit_result = fragments_result
+                        else:
+                            self._mark_stage(account, FRAGMENTS_CLAIMED)
+
+                    if self.config['tactic']['enabled'] and not self._stage_done(account, TACTIC_SAVED):
+                        with self.events.stage('tactic', account.number, current_attempt, api,
+                                               address=account.address) as event:
+                            tactic_result = api.tactic_claim(token, account.address, account.number, total_accounts,
+                                                             self.config['tactic']['old_account'])
+                            event['ok'] = tactic_result.ok
+                        if not tactic_result:
+                            tasks_completed = False
+                            if tactic_result.circuit_open:
+                                circuit_result = tactic_result
+                        else:
+                            self._mark_stage(account, TACTIC_SAVED)
+
                     if tasks_completed:
-                        self._write_success(private_key, wallet_address)
-                        success_log(f"Account {account_number}: {wallet_address} - All tasks completed successfully")
-                        self.retry_manager.add_success_account(account_data)
+                        self._write_success(account.private_key, account.address)
+                        success_log(f"Account {account.number}: {account.address} - All tasks completed successfully")
+                        self.retry_manager.add_success_account(account)
                         return True
+                    elif circuit_result is not None:
+                        return self._park(account, circuit_result)
                     else:
                         current_attempt += 1
-                        session.close()
                         sleep(2)
                         continue
 
                 except requests.exceptions.RequestException as e:
-                    if "429" in str(e):
-                        info_log(f'Rate limit exception for account {account_number}, retrying...')
+                    if getattr(e.response, 'status_code', None) == 429:
+                        info_log(f'Rate limit exception for account {account.number}, retrying...')
                         current_attempt += 1
                         sleep(2)
                         continue
-                    error_log(f'Request error for account {account_number}: {str(e)}')
+                    error_log(f'Request error for account {account.number}: {str(e)}')
                     current_attempt += 1
-                    session.close()
                     sleep(2)
                     continue
                     
                 finally:
-                    if session:
-                        session.close()
+                    self.session_pool.release(session, proxy)
 
             except Exception as e:
-                error_log(f"Error processing account {account_number}: {str(e)}")
+                error_log(f"Error processing account {account.number}: {str(e)}")
                 current_attempt += 1
                 sleep(2)
                 continue
 
-        error_log(f'All attempts exhausted for account {account_number}')
-        self._write_failure(private_key, wallet_address)
-        self.retry_manager.add_failed_account(account_data)
+        error_log(f'All attempts exhausted for account {account.number}')
+        self._write_failure(account.private_key, account.address)
+        self.retry_manager.add_failed_account(account)
         return False
 
 
-    def retry_failed_accounts(self):
+    def _run_delayed(self, schedule, total_accounts):
+        threads = self.limiter.max_limit
+        slots = threading.BoundedSemaphore(threads * 2)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            for start_time, account in schedule:
+                delay = start_time - time.monotonic()
+                if delay > 0:
+                    sleep(delay)
+                slots.acquire()
+                future = executor.submit(self.process_account_with_retry, account, total_accounts)
+                future.add_done_callback(lambda _: slots.release())
+
+    def _failure_file_schedule(self, failed_accounts, group_size):
+        start_time = time.monotonic() + self.retry_delay
+        schedule = []
+        for idx, (private_key, wallet_address) in enumerate(failed_accounts, 1):
+            account = Account(idx, private_key, wallet_address)
+            self.retry_manager.reset_account(account)
+            self.retry_manager.add_pending(account)
+            schedule.append((start_time + (idx - 1) // group_size * self.retry_delay, account))
+        return schedule
+
+    def _drain_retries(self):
         while self.retry_manager.should_continue_retrying():
-            retry_accounts = self.retry_manager.get_retry_accounts()
-            if retry_accounts:
-                info_log(f"Retrying {len(retry_accounts)} accounts from current session. Success rate: "
+            schedule = self.retry_manager.get_retry_schedule()
+            if schedule:
+                info_log(f"Retrying {len(schedule)} accounts from current session. Success rate: "
                         f"{self.retry_manager.get_success_rate()*100:.2f}%")
-                
-                with concurrent.futures.ThreadPoolExecutor(max_workers=self.config['app']['threads']) as executor:
-                    futures = []
-                    for account_number, private_key, wallet_address in retry_accounts:
-                        sleep(self.retry_delay)
-                        future = executor.submit(
-                            self.process_account_with_retry,
-                            account_number,
-                            private_key,
-                            wallet_address,
-                            len(retry_accounts)
-                        )
-                        futures.append(future)
-                    concurrent.futures.wait(futures)
+                self._run_delayed(schedule, len(schedule))
+
+    def retry_failed_accounts(self):
+        self._drain_retries()
 
         try:
-            if os.path.exists(self.config['app']['failure_file']):
-                with open(self.config['app']['failure_file'], 'r') as f:
-                    failed_accounts = []
-                    seen_accounts = set()
-                    
-                    for line in f:
-                        if line.strip():
-                            try:
-                                private_key, wallet_address = line.strip().split(':')
-                                if wallet_address not in seen_accounts:
-                                    failed_accounts.append((private_key, wallet_address))
-                                    seen_accounts.add(wallet_address)
-                            except ValueError:
-                                error_log(f"Invalid line format in failure_accounts.txt: {line.strip()}")
-                                continue
-                if failed_accounts:
-                    info_log(f"Processing {len(failed_accounts)} unique accounts from failure_accounts.txt...")
-                    
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=self.config['app']['threads']) as executor:
-                        futures = []
-                        for idx, (private_key, wallet_address) in enumerate(failed_accounts, 1):
-                            sleep(self.retry_delay)
-                            future = executor.submit(
-                                self.process_account_with_retry,
-                                idx,
-                                private_key,
-                                wallet_address,
-                                len(failed_accounts)
-                            )
-                            futures.append(future)
-                        concurrent.futures.wait(futures)
-                    
-                    success_rate = self.retry_manager.get_success_rate() * 100
-                    info_log(f"Final success rate for failure_accounts.txt: {success_rate:.2f}%")
-                else:
-                    info_log("No valid accounts found in failure_accounts.txt")
-                    
-                open(self.config['app']['failure_file'], 'w').close()
-                
+            failed_accounts = self.failure_ledger.read_entries()
+            self.failure_ledger.clear()
+            if failed_accounts:
+                info_log(f"Processing {len(failed_accounts)} unique accounts from failure_accounts.txt...")
+                self.retry_manager.reset_final_failed()
+
+                self._run_delayed(self._failure_file_schedule(failed_accounts, self.limiter.max_limit), len(failed_accounts))
+                self._drain_retries()
+                self.retry_manager.fail_unfinished()
+
+                success_rate = self.retry_manager.get_success_rate() * 100
+                info_log(f"Final success rate for failure_accounts.txt: {success_rate:.2f}%")
+            else:
+                info_log("No valid accounts found in failure_accounts.txt")
+
         except Exception as e:
             error_log(f"Error processing failure_accounts.txt: {str(e)}")
 
     def _write_success(self, private_key, wallet_address):
-        with self.lock:
-            try:
-                with open(self.config['app']['success_file'], 'a') as f:
-                    f.write(f'{private_key}:{wallet_address}\n')
+        try:
+            if self.success_ledger.add(private_key, wallet_address):
                 info_log(f'Successfully wrote {wallet_address} to success file')
-            except Exception as e:
-                error_log(f'Error writing to success file: {str(e)}')
+        except Exception as e:
+            error_log(f'Error writing to success file: {str(e)}')
 
     def _write_failure(self, private_key, wallet_address):
-        with self.lock:
-            try:
-                existing_entries = set()
-                if os.path.exists(self.config['app']['failure_file']):
-                    with open(self.config['app']['failure_file'], 'r') as f:
-                        existing_entries = {line.strip() for line in f}
-
-                new_entry = f"{private_key}:{wallet_address}"
-                
-                if new_entry not in existing_entries:
-                    with open(self.config['app']['failure_file'], 'a') as f:
-                        f.write(f'{new_entry}\n')
-                    info_log(f'Wrote {wallet_address} to failure file')
-            except Exception as e:
-                error_log(f'Error writing to failure file: {str(e)}')
+        try:
+            if self.failure_ledger.add(private_key, wallet_address):
+                info_log(f'Wrote {wallet_address} to failure file')
+        except Exception as e:
+            error_log(f'Error writing to failure file: {str(e)}')
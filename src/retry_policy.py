@@ -0,0 +1,203 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Tuple
+import pytz
+import requests
+from .circuit_breaker import CircuitOpenError
+from .utils import rate_limit_log
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+class CallResult:
+    __slots__ = ('ok', 'status', 'value', 'retry_after', 'error', 'circuit_open')
+
+    def __init__(self, ok: bool, status: Optional[int] = None, value: Any = None,
+                 retry_after: Optional[float] = None, error: Optional[str] = None, circuit_open: bool = False):
+        self.ok = ok
+        self.status = status
+        self.value = value
+        self.retry_after = retry_after
+        self.error = error
+        self.circuit_open = circuit_open
+
+    @classmethod
+    def success(cls, value: Any = True, status: Optional[int] = None) -> 'CallResult':
+        return cls(True, status=status, value=value)
+
+    @classmethod
+    def failure(cls, status: Optional[int] = None, retry_after: Optional[float] = None,
+                error: Optional[str] = None) -> 'CallResult':
+        return cls(False, status=status, retry_after=retry_after, error=error)
+
+    @classmethod
+    def from_response(cls, response: requests.Response, value: Any = None) -> 'CallResult':
+        if value is not None:
+            return cls.success(value, response.status_code)
+        return cls.failure(response.status_code, parse_retry_after(response))
+
+    @classmethod
+    def from_exception(cls, error: Exception) -> 'CallResult':
+        if isinstance(error, CircuitOpenError):
+            return cls(False, retry_after=error.retry_after, error=str(error), circuit_open=True)
+        return cls.failure(error=str(error))
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status == 429
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        return f'CallResult(ok={self.ok}, status={self.status})'
+
+def parse_retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=pytz.UTC)
+    return max(0.0, (retry_at - datetime.now(pytz.UTC)).total_seconds())
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1, max_delay: float = 30,
+                 deadline: Optional[float] = None, retry_statuses=RETRYABLE_STATUSES, breakers=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_statuses = retry_statuses
+        self.breakers = breakers
+
+    @classmethod
+    def from_config(cls, config, deadline: Optional[float] = None, breakers=None) -> 'RetryPolicy':
+        return cls(
+            max_attempts=config['app'].get('retry_max_attempts', 5),
+            base_delay=config['app'].get('retry_base_delay', 1),
+            max_delay=config['app'].get('retry_max_delay', 30),
+            deadline=deadline,
+            breakers=breakers
+        )
+
+    def with_attempts(self, max_attempts: int) -> 'RetryPolicy':
+        return RetryPolicy(max_attempts, self.base_delay, self.max_delay, self.deadline, self.retry_statuses,
+                           self.breakers)
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        if attempt + 1 >= self.max_attempts:
+            return None
+        if retry_after is not None and retry_after > self.max_delay:
+            return None
+
+        delay = self.backoff(attempt, retry_after)
+        remaining = self.remaining()
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    def wait(self, attempt: int, retry_after: Optional[float] = None) -> bool:
+        delay = self._delay(attempt, retry_after)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    async def wait_async(self, attempt: int, retry_after: Optional[float] = None) -> bool:
+        delay = self._delay(attempt, retry_after)
+        if delay is None:
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+    def call(self, send: Callable[[], requests.Response], label: str = 'request',
+             endpoint: Optional[str] = None) -> requests.Response:
+        breaker = self.breakers.get(endpoint) if self.breakers is not None and endpoint else None
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_request()
+            try:
+                response = send()
+            except requests.exceptions.RequestException:
+                if breaker is not None:
+                    breaker.record(None)
+                if self.wait(attempt):
+                    attempt += 1
+                    continue
+                raise
+            except BaseException:
+                if breaker is not None:
+                    breaker.record(None)
+                raise
+
+            if breaker is not None:
+                breaker.record(response.status_code)
+            if response.status_code not in self.retry_statuses:
+                return response
+
+            retry_after = parse_retry_after(response)
+            if response.status_code == 429:
+                rate_limit_log(f'Rate limit hit on {label}, attempt {attempt + 1}/{self.max_attempts}')
+            if not self.wait(attempt, retry_after):
+                return response
+            attempt += 1
+
+    async def call_async(self, send: Callable[[], Awaitable[Tuple[int, Any, Optional[float]]]],
+                         label: str = 'request', endpoint: Optional[str] = None,
+                         errors=(Exception,)) -> Tuple[int, Any, Optional[float]]:
+        breaker = self.breakers.get(endpoint) if self.breakers is not None and endpoint else None
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_request()
+            try:
+                status, data, retry_after = await send()
+            except errors:
+                if breaker is not None:
+                    breaker.record(None)
+                if await self.wait_async(attempt):
+                    attempt += 1
+                    continue
+                raise
+            except BaseException:
+                if breaker is not None:
+                    breaker.record(None)
+                raise
+
+            if breaker is not None:
+                breaker.record(status)
+            if status not in self.retry_statuses:
+                return status, data, retry_after
+
+            if status == 429:
+                rate_limit_log(f'Rate limit hit on {label}, attempt {attempt + 1}/{self.max_attempts}')
+            if not await self.wait_async(attempt, retry_after):
+                return status, data, retry_after
+            attempt += 1
@@ -0,0 +1,153 @@
+import concurrent.futures
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
+import pytz
+from .account import Account
+from .utils import error_log, info_log
+
+LOOKUP_BATCH_SIZE = 500
+
+def only_daily_enabled(config) -> bool:
+    return (config['daily']['enabled']
+            and not config['info_check']
+            and not config['quest']['enabled']
+            and not config['fragments']['enabled']
+            and not config['tactic']['enabled'])
+
+def iter_due_times(accounts: Iterable[Account], account_storage) -> Iterator[Tuple[Account, Optional[datetime]]]:
+    accounts = iter(accounts)
+    while True:
+        batch = list(itertools.islice(accounts, LOOKUP_BATCH_SIZE))
+        if not batch:
+            return
+        due_times = account_storage.get_next_daily_claim_times([account.address for account in batch])
+        for account in batch:
+            yield account, due_times.get(account.address)
+
+class SkippedClaims:
+    def __init__(self):
+        self.count = 0
+        self.next_due: Optional[datetime] = None
+
+    def add(self, due_time: datetime):
+        self.count += 1
+        if self.next_due is None or due_time < self.next_due:
+            self.next_due = due_time
+
+def format_due(due_time: datetime) -> str:
+    hours, remainder = divmod(max(0, int((due_time - datetime.now(pytz.UTC)).total_seconds())), 3600)
+    minutes, _ = divmod(remainder, 60)
+    return f'{due_time.isoformat()} (in {hours}h {minutes}m)'
+
+def plan_daily_claims(accounts: Iterable[Account], account_storage, skipped: SkippedClaims) -> Iterator[Account]:
+    for account, due_time in iter_due_times(accounts, account_storage):
+        if due_time is None:
+            yield account
+        else:
+            skipped.add(due_time)
+            info_log(f'Account {account.number}: {account.address} skipped, daily claim due at {format_due(due_time)}')
+
+def report_skipped(skipped: SkippedClaims):
+    if not skipped.count:
+        return
+
+    info_log(f'Skipped {skipped.count} accounts whose daily claim is not due yet, '
+             f'next due at {format_due(skipped.next_due)}')
+
+class DailyScheduler:
+    def __init__(self, processor, accounts: Iterable[Account], total_accounts: int, retry_interval: float = 3600):
+        self.processor = processor
+        self.retry_interval = retry_interval
+        self.heap = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.executor = None
+        self.slots = None
+        self.total_accounts = total_accounts
+
+        now = time.time()
+        for account, due_time in iter_due_times(accounts, processor.account_storage):
+            self.heap.append((due_time.timestamp() if due_time else now, account.number, account))
+        heapq.heapify(self.heap)
+
+    def _push(self, due_time: float, account: Account):
+        with self.lock:
+            heapq.heappush(self.heap, (due_time, account.number, account))
+        self.wakeup.set()
+
+    def _reschedule(self, account: Account):
+        parked_delay = self.processor.retry_manager.parked_delay(account)
+        if parked_delay is not None:
+            self._push(time.time() + parked_delay, account)
+            return
+
+        due_time = None
+        try:
+            due_time = self.processor.account_storage.get_next_daily_claim_time(account.address)
+        except Exception as e:
+            error_log(f'Error reading next claim time for account {account.number}: {str(e)}')
+
+        due_time = due_time.timestamp() if due_time else time.time() + self.retry_interval
+        self._push(due_time, account)
+
+    def _finished(self, account: Account):
+        try:
+            self._reschedule(account)
+        finally:
+            self.slots.release()
+
+    def _dispatch(self, account: Account):
+        account.stages.clear()
+        self.processor.retry_manager.reset_account(account)
+        self.processor.retry_manager.add_pending(account)
+        self.slots.acquire()
+        future = self.executor.submit(self.processor.process_account_with_retry, account, self.total_accounts)
+        future.add_done_callback(lambda _: self._finished(account))
+
+    def _pop_due(self):
+        with self.lock:
+            now = time.time()
+            due = []
+            while self.heap and self.heap[0][0] <= now:
+                due.append(heapq.heappop(self.heap))
+            delay = self.heap[0][0] - now if self.heap else None
+            self.wakeup.clear()
+        return due, delay
+
+    def run(self):
+        info_log(f'Scheduler started with {len(self.heap)} accounts')
+        threads = self.processor.limiter.max_limit
+        self.slots = threading.BoundedSemaphore(threads * 2)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+        try:
+            dispatched = 0
+            while not self.stopped:
+                due, delay = self._pop_due()
+                for _, _, account in due:
+                    if self.stopped:
+                        break
+                    self._dispatch(account)
+
+                if due:
+                    dispatched += len(due)
+                    continue
+
+                if dispatched:
+                    info_log(f'Dispatched {dispatched} due accounts')
+                    if delay is not None:
+                        next_due = datetime.fromtimestamp(time.time() + delay, pytz.UTC)
+                        info_log(f'Next account due at {next_due.isoformat()}')
+                    dispatched = 0
+
+                self.wakeup.wait(delay)
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
@@ -0,0 +1,75 @@
+import threading
+from collections import deque
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+class SessionPool:
+    HOSTS = (
+        'https://fantasy.top',
+        'https://api-v2.fantasy.top',
+        'https://privy.fantasy.top'
+    )
+
+    def __init__(self, max_idle: int = 10, pool_maxsize: int = 2):
+        self.max_idle = max_idle
+        self.pool_maxsize = pool_maxsize
+        self.idle = {}
+        self.idle_count = 0
+        self.lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.HOSTS), pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _reset(self, session: requests.Session):
+        session.cookies.clear()
+        session.headers = requests.utils.default_headers()
+        session.hooks = requests.hooks.default_hooks()
+        session.proxies = {}
+
+    def acquire(self, proxy: Optional[str] = None) -> requests.Session:
+        with self.lock:
+            sessions = self.idle.get(proxy)
+            if sessions:
+                self.idle_count -= 1
+                session = sessions.pop()
+            else:
+                session = None
+
+        if session is None:
+            session = self._create_session()
+        self._reset(session)
+        return session
+
+    def release(self, session: requests.Session, proxy: Optional[str] = None):
+        self._reset(session)
+        with self.lock:
+            if self.idle_count < self.max_idle:
+                self.idle.setdefault(proxy, deque()).append(session)
+                self.idle_count += 1
+                return
+
+            evicted = None
+            for idle_proxy, sessions in self.idle.items():
+                if idle_proxy != proxy and sessions:
+                    evicted = sessions.popleft()
+                    break
+            if evicted is None:
+                evicted = session
+            else:
+                self.idle.setdefault(proxy, deque()).append(session)
+
+        evicted.close()
+
+    def close(self):
+        with self.lock:
+            sessions = [session for idle_sessions in self.idle.values() for session in idle_sessions]
+            self.idle = {}
+            self.idle_count = 0
+
+        for session in sessions:
+            session.close()
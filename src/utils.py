@@ -1,24 +1,143 @@
+import atexit
 import json
 import os
+import queue
+import re
+import sys
+import threading
 from datetime import datetime
 from colorama import Fore, init
 from itertools import cycle
 from time import sleep
+from .account import Account
 
 init(autoreset=True)
 
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+class LogSink:
+    def __init__(self, log_file: str = "logs/app.log", max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 3, colors: bool = True, batch_size: int = 256):
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.colors = colors
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.file = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='log-sink', daemon=True)
+        self.thread.start()
+
+    def write(self, color: str, log_message: str):
+        if self.closed:
+            self._write_batch([(color, log_message)])
+            return
+        self.queue.put((color, log_message))
+
+    def _open(self):
+        directory = os.path.dirname(self.log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.log_file, 'a', encoding='utf-8')
+
+    def _rotate(self):
+        self.file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f'{self.log_file}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.log_file}.{index + 1}')
+        if self.backup_count > 0:
+            os.replace(self.log_file, f'{self.log_file}.1')
+        else:
+            os.remove(self.log_file)
+        self._open()
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                sys.stderr.write(f'Log sink error: {str(e)}\n')
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+
+        if self.colors:
+            console = ''.join(f'{color}{log_message}{Fore.RESET}\n' for color, log_message in batch)
+        else:
+            console = ''.join(ANSI_ESCAPE.sub('', log_message) + '\n' for _, log_message in batch)
+        sys.stdout.write(console)
+        sys.stdout.flush()
+
+        if self.file is None:
+            self._open()
+        self.file.write(''.join(log_message + '\n' for _, log_message in batch))
+        self.file.flush()
+
+        if self.max_bytes > 0 and self.file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        if self.file:
+            self.file.close()
+            self.file = None
+
+_log_sink = None
+_log_sink_lock = threading.Lock()
+
+def get_log_sink() -> LogSink:
+    global _log_sink
+    with _log_sink_lock:
+        if _log_sink is None:
+            _log_sink = LogSink()
+            atexit.register(_log_sink.close)
+        return _log_sink
+
+def configure_logging(config):
+    global _log_sink
+    app_config = config.get('app', {})
+    sink = LogSink(
+        log_file=app_config.get('log_file', 'logs/app.log'),
+        max_bytes=app_config.get('log_max_bytes', 10 * 1024 * 1024),
+        backup_count=app_config.get('log_backup_count', 3),
+        colors=app_config.get('console_colors', True)
+    )
+    with _log_sink_lock:
+        previous, _log_sink = _log_sink, sink
+    atexit.register(sink.close)
+    if previous:
+        previous.close()
+        atexit.unregister(previous.close)
+
 def get_current_time():
     return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-def write_to_log_file(log_message: str):
-    with open("logs/app.log", "a") as log_file:
-        log_file.write(log_message + "\n")
+def write_to_log_file(log_message: str, color: str = ''):
+    get_log_sink().write(color, log_message)
 
 def error_log(message: str):
     current_time = get_current_time()
     log_message = f">> ERROR | {current_time} | {message}"
-    print(Fore.RED + log_message)
-    write_to_log_file(log_message)
+    write_to_log_file(log_message, Fore.RED)
 
 def get_user_agents():
     return [
@@ -192,14 +311,12 @@ def read_user_agents():
 def success_log(message: str):
     current_time = get_current_time()
     log_message = f">> SUCCESS | {current_time} | {message}"
-    print(Fore.GREEN + log_message)
-    write_to_log_file(log_message)
+    write_to_log_file(log_message, Fore.GREEN)
 
 def info_log(message: str):
     current_time = get_current_time()
     log_message = f">> INFO | {current_time} | {message}"
-    print(Fore.LIGHTBLACK_EX + log_message)
-    write_to_log_file(log_message)
+    write_to_log_file(log_message, Fore.LIGHTBLACK_EX)
 
 def ensure_directories():
     directories = ['data', 'logs']
@@ -209,11 +326,9 @@ def ensure_directories():
 def rate_limit_log(message: str):
     current_time = get_current_time()
     log_message = f">> RATE LIMIT | {current_time} | {message}"
-    print(Fore.LIGHTBLACK_EX + log_message)
-    write_to_log_file(log_message)
+    write_to_log_file(log_message, Fore.LIGHTBLACK_EX)
 
-def load_config():
-    config_path = 'data/config.json'
+def load_config(config_path='data/config.json'):
     try:
         with open(config_path, 'r') as f:
             return json.load(f)
@@ -232,21 +347,38 @@ def read_proxies(proxy_file):
     
     return proxies_dict, all_proxies
 
-def read_accounts(file_path):
-    unique_accounts = {}
+def _address_key(wallet_address):
+    if len(wallet_address) == 42 and wallet_address[:2] in ('0x', '0X'):
+        try:
+            return bytes.fromhex(wallet_address[2:])
+        except ValueError:
+            pass
+    return wallet_address
+
+def iter_accounts(file_path):
+    seen = set()
+    account_number = 0
     with open(file_path, 'r') as f:
         for line in f:
-            if line.strip():
-                try:
-                    private_key, wallet_address = line.strip().split(':')
-                    if wallet_address not in unique_accounts:
-                        unique_accounts[wallet_address] = private_key
-                except ValueError:
-                    continue
-                    
-    return [(i, (private_key, address)) 
-            for i, (address, private_key) 
-            in enumerate(unique_accounts.items(), 1)]
+            if not line.strip():
+                continue
+            try:
+                private_key, wallet_address = line.strip().split(':')
+            except ValueError:
+                continue
+
+            address_key = _address_key(wallet_address)
+            if address_key in seen:
+                continue
+            seen.add(address_key)
+            account_number += 1
+            yield Account(account_number, private_key, wallet_address)
+
+def count_accounts(file_path):
+    return sum(1 for _ in iter_accounts(file_path))
+
+def read_accounts(file_path):
+    return list(iter_accounts(file_path))
 
 def countdown_timer(seconds):
     for i in range(seconds, 0, -1):